@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Long-running alternative to the cron jobs: plays each adhan on time.
+
+Cron only has minute granularity and starts playAzaan.sh after its own
+fork and shell startup. This daemon computes the exact prayer instants
+(as float hours from PrayTimes, or the minute times of a Mawaqit file),
+sleeps on the monotonic clock until each deadline and launches the
+playback command right away, logging how late each start was.
+"""
+
+import datetime
+import heapq
+import logging
+import subprocess
+import sys
+import time
+from collections import namedtuple
+from os.path import dirname, abspath
+
+root_dir = dirname(abspath(__file__))
+sys.path.insert(0, root_dir)
+
+import updateAzaanTimers as azaan
+
+LOG = logging.getLogger('adhanDaemon')
+
+PRAYERS = ['fajr', 'dhuhr', 'asr', 'maghrib', 'isha']
+
+# Longest single sleep: deadlines are re-derived from the wall clock this
+# often, so NTP corrections (a Pi has no RTC) and suspends are picked up.
+RESYNC_SECONDS = 600
+
+# Start jitter above this is logged as a warning
+JITTER_TARGET = 0.1
+
+PrayerEvent = namedtuple('PrayerEvent', 'when name command')
+
+
+def parse_args(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Play the adhan at each prayer time without cron')
+    parser.add_argument(
+        '--config',
+        dest='config_path',
+        default=azaan.pathjoin(root_dir, 'settings.json'),
+        help='Path to JSON config file (default: ./settings.json)',
+    )
+    parser.add_argument('--dry-run', action='store_true', help='Log the events instead of playing audio')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Log debug messages')
+    return parser.parse_args(argv)
+
+
+def day_events(general, prayers_cfg, day, log_file_path):
+    """Return the PrayerEvents of one local date, in time order."""
+    midnight = datetime.datetime.combine(day, datetime.time())
+    if general.get('mode', 'calculated') == 'mawaqit':
+        times = azaan.get_times_from_mawaqit(general['mawaqit_file'], [day])[0]
+        hours = dict((name, t.hour + t.minute / 60.0) for name, t in times.items())
+    else:
+        from praytimes import PrayTimes
+        location = general.get('location', {}) or {}
+        pt = PrayTimes(general.get('method'))
+        hours = pt.getTimes(day, (location['lat'], location['lng']),
+                            -(time.timezone / 3600), azaan.is_dst_on(day), 'Float')
+    events = []
+    for name in PRAYERS:
+        enabled, audio, volume = azaan.get_prayer_config(general, prayers_cfg, name)
+        if not enabled:
+            continue
+        if not isinstance(hours[name], float):
+            LOG.warning('No %s time on %s at this location, skipping', name, day)
+            continue
+        command = azaan.build_play_command(audio, volume, log_file_path)
+        events.append(PrayerEvent(midnight + datetime.timedelta(hours=hours[name]), name, command))
+    return sorted(events)
+
+
+def sleep_until(when):
+    """Sleep until the local wall time `when`; returns its monotonic deadline."""
+    while True:
+        deadline = time.monotonic() + (when - datetime.datetime.now()).total_seconds()
+        remaining = deadline - time.monotonic()
+        if remaining <= RESYNC_SECONDS:
+            if remaining > 0:
+                time.sleep(remaining)
+            return deadline
+        time.sleep(RESYNC_SECONDS)
+
+
+def fire(event, deadline, dry_run=False):
+    """Launch an event's command and return its start jitter in seconds."""
+    if not dry_run:
+        subprocess.Popen(event.command, shell=True, cwd=root_dir,
+                         stdin=subprocess.DEVNULL, start_new_session=True)
+    jitter = time.monotonic() - deadline
+    log = LOG.warning if jitter > JITTER_TARGET else LOG.info
+    log('%s %s at %s, started %.1f ms after deadline',
+        'Would play' if dry_run else 'Playing', event.name, event.when.strftime('%H:%M:%S'), jitter * 1000)
+    return jitter
+
+
+def run(general, prayers_cfg, log_file_path, dry_run=False, now=None):
+    """Schedule and fire events forever, a day at a time."""
+    day = (now or datetime.datetime.now()).date()
+    # Running totals only: the daemon runs for months
+    fired, total_jitter, max_jitter = 0, 0.0, float('-inf')
+    while True:
+        queue = [e for e in day_events(general, prayers_cfg, day, log_file_path)
+                 if e.when > datetime.datetime.now()]
+        heapq.heapify(queue)
+        LOG.info('Scheduled %d events for %s', len(queue), day)
+        while queue:
+            event = heapq.heappop(queue)
+            LOG.debug('Next: %s at %s', event.name, event.when)
+            deadline = sleep_until(event.when)
+            jitter = fire(event, deadline, dry_run)
+            fired += 1
+            total_jitter += jitter
+            max_jitter = max(max_jitter, jitter)
+        if fired:
+            LOG.info('Start jitter so far: max %.1f ms, mean %.1f ms over %d events',
+                     max_jitter * 1000, total_jitter / fired * 1000, fired)
+        day += datetime.timedelta(days=1)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s %(levelname)s %(message)s')
+
+    config, config_path = azaan.load_config(args.config_path)
+    general = config.get('general', {})
+    prayers_cfg = config.get('prayers', {})
+    azaan.validate_config(general)
+    log_file_path = azaan.resolve_path(general.get('log_file', 'adhan.log')) or azaan.pathjoin(root_dir, 'adhan.log')
+
+    try:
+        run(general, prayers_cfg, log_file_path, args.dry_run)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
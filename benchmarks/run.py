@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""Benchmark suite for praytimes and the scheduler pipeline.
+
+Each benchmark is timed with time.perf_counter, then run once more under
+tracemalloc to record its peak allocation. Results are written as JSON and
+compared against a stored baseline; a benchmark that is slower than the
+baseline by more than the tolerance is reported as a regression and makes
+the run exit non-zero. Baselines are machine specific, so refresh the
+stored one on the machine that runs the comparison.
+
+The scalar praytimes benchmarks clear the shared sun position cache
+before every timed repetition, so they measure a cold start; the
+variants ending in .warm keep the cache filled between repetitions.
+
+    python benchmarks/run.py                    # run and compare
+    python benchmarks/run.py --update-baseline  # store this run as baseline
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from os.path import dirname, abspath, join as pathjoin
+
+bench_dir = dirname(abspath(__file__))
+root_dir = dirname(bench_dir)
+sys.path.insert(0, root_dir)
+
+from praytimes import PrayTimes, loadNumpy
+
+try:
+    np = loadNumpy()
+except ImportError:
+    np = None
+
+BASELINE = pathjoin(bench_dir, 'baseline.json')
+RESULTS = pathjoin(bench_dir, 'results.json')
+
+BENCHMARKS = []
+
+
+def benchmark(name, unit, better):
+    """Register a benchmark. The function takes no arguments and returns
+    (value, run) where run() repeats the measured work once for tracemalloc."""
+    def wrap(func):
+        BENCHMARKS.append({'name': name, 'unit': unit, 'better': better, 'func': func})
+        return func
+    return wrap
+
+
+def _locations(count):
+    step = 120.0 / count
+    return [(-55 + i * step, -170 + (i * 37) % 340, 0) for i in range(count)]
+
+
+def _cold(run):
+    """Wrap run() to start from an empty sun position cache."""
+    def cold():
+        PrayTimes.ephemeris.clear()
+        run()
+    return cold
+
+
+def _latency(cold):
+    pt = PrayTimes('ISNA')
+    day = datetime.date(2024, 3, 1)
+    run = lambda: pt.getTimes(day, (43, -80), -5)
+    samples = []
+    for _ in range(2000):
+        if cold:
+            PrayTimes.ephemeris.clear()
+        start = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e6, _cold(run) if cold else run
+
+
+@benchmark('praytimes.getTimes.latency', 'us/call', 'lower')
+def bench_get_times_latency():
+    return _latency(cold=True)
+
+
+@benchmark('praytimes.getTimes.latency.warm', 'us/call', 'lower')
+def bench_get_times_latency_warm():
+    return _latency(cold=False)
+
+
+def _year_scalar(cold):
+    pt = PrayTimes('MWL')
+    days = [datetime.date(2024, 1, 1) + datetime.timedelta(i) for i in range(366)]
+    def run():
+        for day in days:
+            pt.getTimes(day, (30.04, 31.24), 2, 0, 'Float')
+    if cold:
+        run = _cold(run)
+    return _throughput(run, len(days)), run
+
+
+@benchmark('praytimes.getTimes.year', 'days/s', 'higher')
+def bench_year_scalar():
+    return _year_scalar(cold=True)
+
+
+@benchmark('praytimes.getTimes.year.warm', 'days/s', 'higher')
+def bench_year_scalar_warm():
+    return _year_scalar(cold=False)
+
+
+@benchmark('praytimes.getTimesRange.year', 'days/s', 'higher')
+def bench_year_range():
+    if np is None:
+        return None, None
+    pt = PrayTimes('MWL')
+    run = lambda: pt.getTimesRange((2024, 1, 1), (2024, 12, 31), (30.04, 31.24), 2)
+    return _throughput(run, 366), run
+
+
+def _locations_scalar(cold):
+    pt = PrayTimes('MWL')
+    day = datetime.date(2024, 6, 21)
+    coords = _locations(1000)
+    def run():
+        for loc in coords:
+            pt.getTimes(day, loc, round(loc[1] / 15), 0, 'Float')
+    if cold:
+        run = _cold(run)
+    return _throughput(run, len(coords)), run
+
+
+@benchmark('praytimes.getTimes.locations', 'locations/s', 'higher')
+def bench_locations_scalar():
+    return _locations_scalar(cold=True)
+
+
+@benchmark('praytimes.getTimes.locations.warm', 'locations/s', 'higher')
+def bench_locations_scalar_warm():
+    return _locations_scalar(cold=False)
+
+
+@benchmark('praytimes.getTimesGrid.locations', 'locations/s', 'higher')
+def bench_locations_grid():
+    if np is None:
+        return None, None
+    pt = PrayTimes('MWL')
+    coords = np.array(_locations(10000))
+    zones = np.round(coords[:, 1] / 15)
+    run = lambda: pt.getTimesGrid((2024, 6, 21), coords, zones)
+    return _throughput(run, len(coords)), run
+
+
+@benchmark('updateAzaanTimers.wall', 'ms/run', 'lower')
+def bench_update_azaan_timers():
+    tmp = tempfile.mkdtemp(prefix='adhan-bench-')
+    try:
+        config = pathjoin(tmp, 'settings.json')
+        shutil.copy(pathjoin(root_dir, 'settings.example.json'), config)
+        with open(config, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        data['general']['log_file'] = pathjoin(tmp, 'adhan.log')
+        with open(config, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        cmd = [sys.executable, pathjoin(root_dir, 'updateAzaanTimers.py'),
+               '--config', config, '--tabfile', pathjoin(tmp, 'crontab')]
+        samples = []
+        for _ in range(5):
+            start = time.perf_counter()
+            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+            samples.append(time.perf_counter() - start)
+        return statistics.median(samples) * 1e3, None
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _throughput(run, count, repeat=5):
+    """Best-of-repeat items per second for run()."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return count / best
+
+
+def _peak_memory(run):
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_all(selected=None):
+    results = {}
+    for bench in BENCHMARKS:
+        if selected and not any(s in bench['name'] for s in selected):
+            continue
+        value, run = bench['func']()
+        if value is None:
+            print(f'{bench["name"]:40s} skipped')
+            continue
+        results[bench['name']] = {
+            'value': value,
+            'unit': bench['unit'],
+            'better': bench['better'],
+            'peak_bytes': _peak_memory(run) if run else None,
+        }
+        print(f'{bench["name"]:40s} {value:14.2f} {bench["unit"]}')
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return the list of benchmarks that regressed against the baseline."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if result['better'] == 'lower':
+            change = result['value'] / base['value'] - 1
+        else:
+            change = base['value'] / result['value'] - 1
+        status = 'REGRESSION' if change > tolerance else 'ok'
+        print(f'{name:40s} {change * 100:+7.1f}% slower than baseline  {status}')
+        if change > tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run praytimes and scheduler benchmarks')
+    parser.add_argument('names', nargs='*', help='Only run benchmarks whose name contains one of these')
+    parser.add_argument('-o', '--output', default=RESULTS, help='Results JSON (default: benchmarks/results.json)')
+    parser.add_argument('--baseline', default=BASELINE, help='Baseline JSON (default: benchmarks/baseline.json)')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed slowdown against the baseline as a fraction (default: 0.25)')
+    parser.add_argument('--update-baseline', action='store_true', help='Store this run as the new baseline')
+    args = parser.parse_args(argv)
+
+    results = run_all(args.names)
+    report = {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f).get('results', {})
+        baseline.update(results)
+        report['results'] = baseline
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f'Baseline updated: {args.baseline}')
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f'No baseline at {args.baseline}; run with --update-baseline to create one')
+        return 0
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f).get('results', {})
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f'{len(regressions)} benchmark(s) regressed: {", ".join(regressions)}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
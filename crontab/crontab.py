@@ -79,6 +79,11 @@ cron.write(filename='/tmp/output.txt')
 job3.schedule().get_next()
 job3.schedule().get_prev()
 
+# The same without croniter, as used by run_pending and run_scheduler
+
+job3.slices.schedule().get_next()
+job3.slices.schedule().get_prev()
+
 """
 
 import os
@@ -90,8 +95,10 @@ import logging
 import tempfile
 import subprocess as sp
 
+import heapq
 from time import sleep
-from collections import OrderedDict
+from collections import OrderedDict, Counter, namedtuple
+from calendar import monthrange
 from datetime import time, date, datetime, timedelta
 
 __pkgname__ = 'python-crontab'
@@ -132,6 +139,11 @@ PY3 = platform.python_version()[0] == '3'
 WINOS = platform.system() == 'Windows'
 SYSTEMV = not WINOS and os.uname()[0] in ["SunOS", "AIX", "HP-UX"]
 
+try:
+    from time import monotonic
+except ImportError:
+    from time import time as monotonic
+
 LOG = logging.getLogger('crontab')
 
 CRONCMD = "/usr/bin/crontab"
@@ -177,6 +189,44 @@ def _unicode(text):
     return text
 
 
+def _split_lines(text, keepends=False):
+    """Yield the lines of text one by one, like text.split('\\n') or with
+    keepends like a file's readlines()"""
+    start = 0
+    end = text.find('\n')
+    while end >= 0:
+        yield text[start:end + 1] if keepends else text[start:end]
+        start = end + 1
+        end = text.find('\n', start)
+    if not keepends or start < len(text):
+        yield text[start:]
+
+
+def _unique(values):
+    """Yield each value once, in the order first seen"""
+    seen = set()
+    for value in values:
+        if value not in seen:
+            seen.add(value)
+            yield value
+
+
+class CronDiff(namedtuple('CronDiff', 'added removed unchanged written')):
+    """Result of a diffed write: job counts against the tab as it was read
+    and whether the crontab was actually written."""
+    __slots__ = ()
+
+    def __str__(self):
+        return "%d added, %d removed, %d unchanged (%s)" % (
+            self.added, self.removed, self.unchanged,
+            'written' if self.written else 'not written')
+
+
+class CronFrequency(namedtuple('CronFrequency', 'job per_year per_day total')):
+    """How often a job runs: days per year, times per day and in total."""
+    __slots__ = ()
+
+
 class CronTab(object):
     """
     Crontab object which can access any time based cron using the standard.
@@ -196,6 +246,16 @@ class CronTab(object):
         self.lines = None
         self.crons = None
         self.filen = None
+        self._source = None
+        self._order = 0
+        self._revision = 0
+        self._seq = {}
+        self._comments = {}
+        self._times = None
+        self._time_keys = None
+        self._stale_times = None
+        self._commands = None
+        self._trigrams = None
         self.env = {}
         # Protect windows users
         self.root = not WINOS and os.getuid() == 0
@@ -239,31 +299,94 @@ class CronTab(object):
         self.crons = []
         self.lines = []
         self.env = OrderedDict()
-        lines = []
+        self._revision += 1
+        self._seq = {}
+        self._comments = {}
+        self._times = None
+        self._time_keys = None
+        self._stale_times = None
+        self._commands = None
+        self._trigrams = None
+        text = ''
         if self.intab is not None:
-            lines = self.intab.split('\n')
+            text = self.intab
+            self._read_lines(_split_lines(text))
         elif filename:
             self.filen = filename
             with codecs.open(filename, 'r', encoding='utf-8') as fhl:
-                lines = fhl.readlines()
+                self._read_lines(fhl)
+            # Not kept: the file is read again if it's ever compared
+            text = None
         elif self.user:
             (out, err) = open_pipe(CRONCMD, l='', **self.user_opt).communicate()
             if err and 'no crontab for' in str(err):
                 pass
             elif err:
                 raise IOError("Read crontab %s: %s" % (self.user, err))
-            lines = out.decode('utf-8').split("\n")
+            text = out.decode('utf-8')
+            self._read_lines(_split_lines(text))
+        self._set_source(text)
+
+    def _read_lines(self, lines):
+        """Parse lines one at a time, without keeping a list of them"""
         for line in lines:
             self.append(CronItem(line, cron=self), line, read=True)
 
+    def _target(self):
+        """Identify where this tab is read from and written to"""
+        if self.intab is not None:
+            return ('tab', self.filen)
+        if self.filen:
+            return ('file', os.path.abspath(self.filen))
+        return ('user', self.user)
+
+    def _set_source(self, text, count=None):
+        """Remember the tab as it is in its source for diffing. Text that
+        was read (count is None) is only parsed again when it's compared,
+        and the text of a file (None) is only read again then."""
+        self._source = (self._target(), text, count)
+
+    def _source_render(self):
+        """Returns the rendered source tab and its number of jobs"""
+        (target, text, count) = self._source
+        if text is None:
+            try:
+                with codecs.open(target[1], 'r', encoding='utf-8') as fhl:
+                    text = fhl.read()
+            except IOError:
+                text = ''
+        if count is None:
+            tab = CronTab(user=False if self._user is False else None, tab=text)
+            (text, count) = (tab.render(), len(tab.crons))
+            self._source = (target, text, count)
+        return (text, count)
+
+    def diff(self):
+        """Compare the jobs in this tab with the tab as last read or
+        written. Returns a CronDiff with the added, removed and unchanged
+        job counts (written is always False here). A tab read from a file
+        is compared with that file as it is now."""
+        if self._source is None:
+            return CronDiff(len(self.crons), 0, 0, False)
+        (old_render, old_count) = self._source_render()
+        old_lines = Counter(old_render.split('\n'))
+        unchanged = 0
+        for (line, count) in Counter(unicode(cron) for cron in self.crons).items():
+            unchanged += min(count, old_lines[line])
+        return CronDiff(len(self.crons) - unchanged, old_count - unchanged,
+                        unchanged, False)
+
     def append(self, cron, line='', read=False):
         """Append a CronItem object to this CronTab"""
         if cron.is_valid():
             if read and not cron.comment and self.lines and \
               self.lines[-1] and self.lines[-1][0] == '#':
                 cron.set_comment(self.lines.pop()[1:].strip())
+            if cron.cron is None:
+                cron.cron = self
             self.crons.append(cron)
             self.lines.append(cron)
+            self._index(cron)
             return cron
         if '=' in line:
             if ' ' not in line or line.index('=') < line.index(' '):
@@ -272,8 +395,29 @@ class CronTab(object):
                 return None
         self.lines.append(line.replace('\n', ''))
 
-    def write(self, filename=None, user=None):
-        """Write the crontab to it's source or a given filename."""
+    def write(self, filename=None, user=None, diff=False):
+        """Write the crontab to it's source or a given filename.
+
+        diff - Compare with the tab as it was read and skip the write when
+               writing back to the same source with identical content.
+               Returns a CronDiff with the job counts (default False)
+        """
+        if diff:
+            result = self.diff()
+            if self._source is not None and \
+              self._source_render()[0] == self.render():
+                (target, _, _) = self._source
+                if filename is not None:
+                    same = target == ('file', os.path.abspath(filename))
+                elif user is not None:
+                    same = target == ('user', user is True and current_user() or user)
+                else:
+                    same = target == self._target()
+                if same:
+                    return result
+            self.write(filename=filename, user=user)
+            return result._replace(written=True)
+
         if filename:
             self.filen = filename
         elif user is not None:
@@ -286,6 +430,7 @@ class CronTab(object):
             self.intab = self.render()
             # And that's it if we never saved to a file
             if not self.filen:
+                self._set_source(self.intab, len(self.crons))
                 return
 
         if self.filen:
@@ -294,7 +439,8 @@ class CronTab(object):
             filed, path = tempfile.mkstemp()
             fileh = os.fdopen(filed, 'wb')
 
-        fileh.write(self.render().encode('utf-8'))
+        text = self.render()
+        fileh.write(text.encode('utf-8'))
         fileh.close()
 
         if not self.filen:
@@ -309,10 +455,11 @@ class CronTab(object):
             else:
                 os.unlink(path)
                 raise IOError("Please specify user or filename to write.")
+        self._set_source(text, len(self.crons))
 
-    def write_to_user(self, user=True):
+    def write_to_user(self, user=True, diff=False):
         """Write the crontab to a user (or root) instead of a file."""
-        return self.write(user=user)
+        return self.write(user=user, diff=diff)
 
     def run_pending(self, **kwargs):
         """Run all commands in this crontab if pending (generator)"""
@@ -322,17 +469,71 @@ class CronTab(object):
                 yield ret
 
     def run_scheduler(self, timeout=0, **kwargs):
-        """Run the CronTab as an internal scheduler (generator)"""
-        count = 0
-        self.run_pending()
-        while count != timeout:
-            count += 1
-            sleep(kwargs.get('cadence', 60))
-            now = datetime.now()
-            if 'warp' in kwargs:
-                now += timedelta(seconds=count * 60)
-            for value in self.run_pending(now=now):
-                yield value
+        """Run the CronTab as an internal scheduler (generator)
+
+        Each enabled job's next run time is kept in a priority queue; the
+        scheduler sleeps until the earliest one, runs it and queues that
+        job's following run time. Jobs added, removed, re-timed or enabled
+        through this tab while it runs are picked up within one cadence
+        period, when the queue is rebuilt.
+
+          timeout - Stop after this many cadence periods (-1 for never)
+          cadence - Length of a period in seconds (default 60)
+          warp    - Let every cadence of real time count as one minute
+        """
+        cadence = kwargs.get('cadence', 60)
+        scale = 60.0 / cadence if 'warp' in kwargs else 1.0
+        start = datetime.now()
+        started = monotonic()
+        # Jobs start counting from the end of the first period, like the
+        # first run_pending call only sets their last_run.
+        begin = start + timedelta(seconds=cadence * scale)
+        end = None
+        if timeout >= 0:
+            end = start + timedelta(seconds=timeout * cadence * scale)
+        for job in self.crons:
+            if job.is_enabled():
+                job.last_run = begin
+
+        # Every run due up to checked was yielded
+        checked = begin
+        revision = None
+        while True:
+            if revision != self._revision:
+                revision = self._revision
+                queue = self._scheduler_queue(checked)
+            now = start + timedelta(seconds=(monotonic() - started) * scale)
+            when = queue[0][0] if queue else None
+            if when is not None and end is not None and when >= end:
+                when = None
+            if when is None and end is not None and now >= end:
+                return
+            if when is not None and when <= now:
+                (when, index, times, job) = queue[0]
+                if not job.is_enabled():
+                    heapq.heappop(queue)
+                    continue
+                heapq.heapreplace(queue, (times.get_next(), index, times, job))
+                job.last_run = checked = when
+                yield job.run()
+                continue
+            checked = max(checked, now)
+            wake = [t for t in (when, end) if t is not None]
+            wait = cadence
+            if wake:
+                wait = min(wait, (min(wake) - now).total_seconds() / scale)
+            sleep(max(wait, 0))
+
+    def _scheduler_queue(self, after):
+        """Return a heap of (next run, position, schedule, job) of every
+        enabled job, for run times after the given one"""
+        queue = []
+        for (index, job) in enumerate(self.crons):
+            if job.is_enabled():
+                times = job.slices.schedule(after)
+                queue.append((times.get_next(), index, times, job))
+        heapq.heapify(queue)
+        return queue
 
     def render(self):
         """Render this crontab as it would be in the crontab."""
@@ -356,39 +557,176 @@ class CronTab(object):
 
     def find_command(self, command):
         """Return an iter of jobs matching any part of the command."""
-        for job in self.crons:
-            if command in job.command:
-                yield job
+        self._index_commands()
+        if len(command) < 3:
+            found = self._commands
+        else:
+            # Only commands holding every three letter part of the query
+            found = self._trigrams.get(command[:3], set())
+            for i in range(1, len(command) - 2):
+                if not found:
+                    break
+                found = found.intersection(self._trigrams.get(command[i:i + 3], ()))
+        jobs = []
+        for value in found:
+            if command in value:
+                jobs.extend(self._commands[value])
+        return self._in_order(jobs)
 
     def find_comment(self, comment):
         """Return an iter of jobs that match the comment field exactly."""
-        for job in self.crons:
-            if job.comment == comment:
-                yield job
+        return self._in_order(self._comments.get(comment, ()))
 
     def find_time(self, *args):
         """Return an iter of jobs that match this time pattern"""
+        self._index_times()
+        return self._in_order(self._times.get(CronSlices(*args).render(), ()))
+
+    def _in_order(self, jobs):
+        """Iterate over the given jobs in the order of the tab"""
+        return iter(sorted(jobs, key=self._seq.get))
+
+    def _index(self, job):
+        """Add a newly appended job to the lookup indexes. Its position is
+        kept here, not on the job, as a job may be in several tabs."""
+        self._order += 1
+        self._revision += 1
+        self._seq.setdefault(job, self._order)
+        if job._tabs is None:
+            job._tabs = [self]
+        elif self not in job._tabs:
+            job._tabs.append(self)
+        self._comments.setdefault(job.comment, []).append(job)
+        if self._times is not None:
+            self._stale_times.add(job)
+        if self._commands is not None:
+            self._index_command(job, job.command)
+
+    def _unindex(self, jobs):
+        """Remove jobs from the lookup indexes"""
+        drop = set(id(job) for job in jobs)
+        self._revision += 1
+        self._drop(self._comments, set(job.comment for job in jobs), drop)
+        if self._times is not None:
+            keys = set(self._time_keys.pop(job, None) for job in jobs)
+            self._drop(self._times, keys, drop)
+            self._stale_times.difference_update(jobs)
+        if self._commands is not None:
+            keys = set(job.command for job in jobs)
+            self._drop(self._commands, keys, drop)
+            for command in keys:
+                if command not in self._commands:
+                    self._unindex_trigrams(command)
+        for job in jobs:
+            self._seq.pop(job, None)
+            if job._tabs and self in job._tabs:
+                job._tabs.remove(self)
+
+    @staticmethod
+    def _drop(index, keys, drop):
+        """Remove the jobs with the given ids from some buckets of an index"""
+        for key in keys:
+            bucket = [job for job in index.get(key, ()) if id(job) not in drop]
+            if bucket:
+                index[key] = bucket
+            else:
+                index.pop(key, None)
+
+    def _comment_changed(self, job, old, new):
+        """Move a job to its new comment in the index"""
+        if job in self._seq:
+            self._drop(self._comments, (old,), set([id(job)]))
+            self._comments.setdefault(new, []).append(job)
+
+    def _command_changed(self, job, old, new):
+        """Move a job to its new command in the (optional) index"""
+        if job in self._seq and self._commands is not None:
+            self._drop(self._commands, (old,), set([id(job)]))
+            if old not in self._commands:
+                self._unindex_trigrams(old)
+            self._index_command(job, new)
+
+    def _time_changed(self, job):
+        """Note that a job's time pattern changed, it is reindexed lazily"""
+        if job in self._seq:
+            self._revision += 1
+            if self._times is not None:
+                self._stale_times.add(job)
+
+    def _enabled_changed(self, job):
+        """Note that a job was enabled or disabled"""
+        if job in self._seq:
+            self._revision += 1
+
+    def _index_times(self):
+        """Build the time index when first needed, then update it for new
+        jobs and jobs whose time pattern changed"""
+        if self._times is None:
+            self._times = {}
+            self._time_keys = {}
+            self._stale_times = set(self.crons)
+        if not self._stale_times:
+            return
+        self._drop(self._times, set(self._time_keys.get(job)
+                   for job in self._stale_times),
+                   set(id(job) for job in self._stale_times))
+        for job in sorted(self._stale_times, key=self._seq.get):
+            key = job.slices.render()
+            self._time_keys[job] = key
+            self._times.setdefault(key, []).append(job)
+        self._stale_times.clear()
+
+    def _index_commands(self):
+        """Build the command substring index the first time it is needed"""
+        if self._commands is None:
+            self._commands = {}
+            self._trigrams = {}
+            for job in self.crons:
+                self._index_command(job, job.command)
+
+    def _index_command(self, job, command):
+        """Add a job under its command and the command's three letter parts"""
+        if command not in self._commands:
+            self._commands[command] = []
+            for i in range(len(command) - 2):
+                self._trigrams.setdefault(command[i:i + 3], set()).add(command)
+        self._commands[command].append(job)
+
+    def _unindex_trigrams(self, command):
+        """Forget a command that no job uses any more"""
+        for i in range(len(command) - 2):
+            trigram = self._trigrams.get(command[i:i + 3])
+            if trigram is not None:
+                trigram.discard(command)
+                if not trigram:
+                    del self._trigrams[command[i:i + 3]]
+
+    def frequency_report(self, year=None):
+        """Return a CronFrequency for every job, counting runs in the given
+        year (defaults to this year) against one shared calendar."""
+        calendar = CronCalendar.for_year(year or date.today().year)
+        report = []
         for job in self.crons:
-            if job.slices == CronSlices(*args):
-                yield job
+            per_year = job.slices.frequency_per_year(calendar=calendar)
+            per_day = job.slices.frequency_per_day()
+            report.append(CronFrequency(job, per_year, per_day, per_year * per_day))
+        return report
 
     @property
     def commands(self):
         """Return a generator of all unqiue commands used in this crontab"""
-        returned = []
-        for cron in self.crons:
-            if cron.command not in returned:
-                yield cron.command
-                returned.append(cron.command)
+        return _unique(cron.command for cron in self.crons)
 
     @property
     def comments(self):
         """Return a generator of all unique comments/Id used in this crontab"""
-        returned = []
-        for cron in self.crons:
-            if cron.comment and cron.comment not in returned:
-                yield cron.comment
-                returned.append(cron.comment)
+        return _unique(cron.comment for cron in self.crons if cron.comment)
+
+    @property
+    def users(self):
+        """Return a generator of all unique users of jobs in this crontab
+        (system crontabs only)"""
+        return _unique(cron.user for cron in self.crons if cron.user)
 
     def remove_all(self, *args, **kwargs):
         """Removes all crons using the stated command OR that have the
@@ -410,19 +748,21 @@ class CronTab(object):
 
     def remove(self, *items):
         """Remove a selected cron from the crontab."""
-        result = 0
-        for item in items:
-            result += self._remove(item)
-        return result
+        return self._remove(*items)
 
-    def _remove(self, item):
-        """Internal removal of an item"""
+    def _remove(self, *items):
+        """Internal removal of items in a single pass over the tab"""
+        drop = set(id(item) for item in items)
+        if not drop or not self.crons:
+            return 0
         # The last item often has a trailing line feed
-        if self.crons[-1] == item and self.lines[-1] == '':
-            self.lines.remove(self.lines[-1])
-        self.crons.remove(item)
-        self.lines.remove(item)
-        return 1
+        if id(self.crons[-1]) in drop and self.lines[-1] == '':
+            self.lines.pop()
+        removed = [cron for cron in self.crons if id(cron) in drop]
+        self.crons[:] = [cron for cron in self.crons if id(cron) not in drop]
+        self.lines[:] = [line for line in self.lines if id(line) not in drop]
+        self._unindex(removed)
+        return len(removed)
 
     def __repr__(self):
         kind = 'System ' if self._user == False else ''
@@ -457,20 +797,25 @@ class CronItem(object):
     An item which objectifies a single line of a crontab and
     May be considered to be a cron job object.
     """
+    __slots__ = ('cron', 'user', 'valid', 'enabled', 'special', '_comment',
+                 '_command', '_tabs', 'last_run', '_log', 'slices')
+
     def __init__(self, line=None, command='', comment='', user=None, cron=None):
         self.cron = cron
         self.user = user
         self.valid = False
         self.enabled = True
         self.special = False
-        self.comment = None
-        self.command = None
+        self._comment = None
+        self._command = None
+        self._tabs = None
         self.last_run = None
 
         self._log = None
 
         # Initalise five cron slices using static info.
         self.slices = CronSlices()
+        self.slices.item = self
 
         self.set_comment(comment)
 
@@ -487,6 +832,30 @@ class CronItem(object):
         else:
             self.cron.remove(self)
 
+    @property
+    def command(self):
+        """The command run by this job"""
+        return self._command
+
+    @command.setter
+    def command(self, value):
+        if value != self._command:
+            for tab in self._tabs or ():
+                tab._command_changed(self, self._command, value)
+        self._command = value
+
+    @property
+    def comment(self):
+        """The comment (or ID) of this job"""
+        return self._comment
+
+    @comment.setter
+    def comment(self, value):
+        if value != self._comment:
+            for tab in self._tabs or ():
+                tab._comment_changed(self, self._comment, value)
+        self._comment = value
+
     def set_command(self, cmd):
         """Set the command and filter as needed"""
         self.command = cmd.strip()
@@ -501,13 +870,14 @@ class CronItem(object):
         if not line or line[0] == '#':
             self.enabled = False
             line = line[1:].strip()
-        self._set_parse(ITEMREX.findall(line))
-        self._set_parse(SPECREX.findall(line))
+        # A special (@daily) line never matches the five slice pattern
+        if not self._set_parse(ITEMREX.findall(line)):
+            self._set_parse(SPECREX.findall(line))
 
     def _set_parse(self, result):
         """Set all the parsed variables into the item"""
         if not result:
-            return
+            return False
         if self.cron.user == False:
             # Special flag to look for per-command user
             (self.user, cmd) = (result[0][-3] + ' ').split(' ', 1)
@@ -518,10 +888,14 @@ class CronItem(object):
         self.valid = self.setall(*result[0][:-3])
         self.comment = result[0][-1]
         self.enabled = self.enabled and self.valid
+        return True
 
     def enable(self, enabled=True):
         """Set if this cron job is enabled or not"""
         if enabled in [True, False]:
+            if enabled != self.enabled:
+                for tab in self._tabs or ():
+                    tab._enabled_changed(self)
             self.enabled = enabled
         return self.enabled
 
@@ -608,7 +982,7 @@ class CronItem(object):
         now = now or datetime.now()
         if self.is_enabled():
             if self.last_run is not None:
-                next_time = self.schedule(self.last_run).get_next()
+                next_time = self.slices.schedule(self.last_run).get_next()
                 if next_time < now:
                     self.last_run = now
                     return self.run()
@@ -760,17 +1134,34 @@ class Every(object):
         self.slices.setall('@yearly')
 
 
+class ClassOrInstance(object):
+    """Pick one of two methods depending on whether it's looked up on the
+    class or on an instance, without storing anything per instance."""
+    def __init__(self, on_class, on_instance):
+        self.on_class = on_class
+        self.on_instance = on_instance
+
+    def __get__(self, obj, cls):
+        if obj is None:
+            return getattr(cls, self.on_class)
+        return getattr(obj, self.on_instance)
+
+
 class CronSlices(list):
     """Controls a list of five time 'slices' which reprisent:
         minute frequency, hour frequency, day of month frequency,
         month requency and finally day of the week frequency.
      """
+    __slots__ = ('special', 'item')
+
     def __init__(self, *args):
         super(CronSlices, self).__init__([CronSlice(info) for info in S_INFO])
         self.special = None
+        self.item = None
+        for vslice in self:
+            vslice.owner = self
         if args and not self.setall(*args):
             raise ValueError("Can't set cron value to: %s" % str(args))
-        self.is_valid = self.is_self_valid
 
     def is_self_valid(self, *args):
         """Object version of is_valid"""
@@ -778,13 +1169,15 @@ class CronSlices(list):
         return CronSlices.is_valid(*args)
 
     @classmethod
-    def is_valid(cls, *args):
+    def is_class_valid(cls, *args):
         """Returns true if the arguments are valid cron pattern"""
         try:
             return bool(cls(*args))
         except Exception:
             return False
 
+    is_valid = ClassOrInstance('is_class_valid', 'is_self_valid')
+
     def setall(self, value, *slices):
         """Parses the various ways date/time frequency can be specified"""
         self.clear()
@@ -853,27 +1246,28 @@ class CronSlices(list):
         for item in self:
             item.clear()
 
+    def changed(self):
+        """Called by a slice when its values change"""
+        # Only jobs added to a tab are indexed by time, by every tab
+        # holding them (not only the tab that created them)
+        if self.item is not None:
+            for tab in self.item._tabs or ():
+                tab._time_changed(self.item)
+
+    def schedule(self, date_from=None):
+        """Return a native schedule of these slices (croniter not needed)"""
+        return CronSchedule(self, date_from)
+
     def frequency(self, year=None):
         """Return frequence per year times frequency per day"""
         return self.frequency_per_year(year=year) * self.frequency_per_day()
 
-    def frequency_per_year(self, year=None):
+    def frequency_per_year(self, year=None, calendar=None):
         """Returns the number of times this item will execute
            in a given year (default is this year)"""
-        result = 0
-        if not year:
-            year = date.today().year
-
-        weekdays = list(self[4])
-
-        for month in self[3]:
-            for day in self[2]:
-                try:
-                    if date(year, month, day).weekday() in weekdays:
-                        result += 1
-                except ValueError:
-                    continue
-        return result
+        if calendar is None:
+            calendar = CronCalendar.for_year(year or date.today().year)
+        return calendar.count(self[3].mask(), self[2].mask(), self[4].mask())
 
     def frequency_per_day(self):
         """Returns the number of times this item will execute in any day"""
@@ -890,6 +1284,176 @@ class CronSlices(list):
         return self.render() == CronSlices(arg).render()
 
 
+def _next_bit(mask, start):
+    """Returns the lowest set bit of mask at or above start, or None"""
+    mask >>= start
+    if not mask:
+        return None
+    return start + (mask & -mask).bit_length() - 1
+
+
+def _prev_bit(mask, start):
+    """Returns the highest set bit of mask at or below start, or None"""
+    if start < 0:
+        return None
+    mask &= (2 << start) - 1
+    if not mask:
+        return None
+    return mask.bit_length() - 1
+
+
+class CronSchedule(object):
+    """Next and previous run times of a set of cron slices.
+
+    Each slice is turned into a bitmask once, and the days of a month
+    are matched as one more bitmask, so finding a run time only takes a
+    few integer operations per month visited. Day of month and day of
+    week are combined like croniter does: unless one of them is a bare
+    '*', a day matches either of them, even when a field such as 0-6
+    covers every value.
+    """
+    # Patterns such as Feb 29 on a Monday can take this long to come round
+    MAX_YEARS = 28
+
+    def __init__(self, slices, date_from=None):
+        (self.minutes, self.hours, self.doms, self.months, self.dows) = \
+            [vslice.mask() for vslice in slices]
+        self.day_or = bool(slices[2].parts) and bool(slices[4].parts)
+        self.cur = date_from or datetime.now()
+
+    def month_days(self, year, month):
+        """Returns the bitmask of scheduled days in the given month"""
+        (first, length) = monthrange(year, month)
+        # Rotate the week so bit 0 is the weekday of the 1st, then repeat
+        # it for five weeks starting at bit 1 (day one).
+        first = (first + 1) % 7
+        week = ((self.dows >> first) | (self.dows << (7 - first))) & 0x7f
+        days = (week * 0x10204081) << 1
+        if self.day_or:
+            days |= self.doms
+        else:
+            days &= self.doms
+        return days & ((2 << length) - 2)
+
+    def get_next(self):
+        """Returns the first run time after the current one and moves to it"""
+        when = self.cur.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        (year, month, day, hour, minute) = \
+            (when.year, when.month, when.day, when.hour, when.minute)
+        limit = year + self.MAX_YEARS
+        while year <= limit:
+            if self.months >> month & 1:
+                found = _next_bit(self.month_days(year, month), day)
+                if found is not None:
+                    if found != day:
+                        (day, hour, minute) = (found, 0, 0)
+                    found = _next_bit(self.hours, hour)
+                    if found is None:
+                        (day, hour, minute) = (day + 1, 0, 0)
+                        continue
+                    if found != hour:
+                        (hour, minute) = (found, 0)
+                    found = _next_bit(self.minutes, minute)
+                    if found is None:
+                        (hour, minute) = (hour + 1, 0)
+                        continue
+                    self.cur = when.replace(year=year, month=month, day=day,
+                                            hour=hour, minute=found)
+                    return self.cur
+            (month, day, hour, minute) = (month + 1, 1, 0, 0)
+            if month > 12:
+                (year, month) = (year + 1, 1)
+        raise ValueError("No run time within %d years" % self.MAX_YEARS)
+
+    def get_prev(self):
+        """Returns the last run time before the current one and moves to it"""
+        when = (self.cur - timedelta(microseconds=1)).replace(
+            second=0, microsecond=0)
+        (year, month, day, hour, minute) = \
+            (when.year, when.month, when.day, when.hour, when.minute)
+        limit = year - self.MAX_YEARS
+        while year >= limit:
+            if self.months >> month & 1:
+                found = _prev_bit(self.month_days(year, month), day)
+                if found is not None:
+                    if found != day:
+                        (day, hour, minute) = (found, 23, 59)
+                    found = _prev_bit(self.hours, hour)
+                    if found is None:
+                        (day, hour, minute) = (day - 1, 23, 59)
+                        continue
+                    if found != hour:
+                        (hour, minute) = (found, 59)
+                    found = _prev_bit(self.minutes, minute)
+                    if found is None:
+                        (hour, minute) = (hour - 1, 59)
+                        continue
+                    self.cur = when.replace(year=year, month=month, day=day,
+                                            hour=hour, minute=found)
+                    return self.cur
+            (month, day, hour, minute) = (month - 1, 31, 23, 59)
+            if month < 1:
+                (year, month) = (year - 1, 12)
+        raise ValueError("No run time within %d years" % self.MAX_YEARS)
+
+    def get_current(self):
+        """Returns the current time of this schedule"""
+        return self.cur
+
+    def __iter__(self):
+        while True:
+            yield self.get_next()
+
+
+class CronCalendar(object):
+    """Days of one year as bitmasks, for counting the days a job runs on.
+
+    Bit (month * 32 + day of month) stands for one date, so a whole
+    year of days-of-month, months and weekdays can be combined with a
+    few integer operations and counted in one go.
+    """
+    _years = {}
+
+    def __init__(self, year):
+        self.year = year
+        self.weekdays = [0] * 7
+        for month in range(1, 13):
+            (first, length) = monthrange(year, month)
+            for day in range(1, length + 1):
+                self.weekdays[(first + day - 1) % 7] |= 1 << (month * 32 + day)
+        self._days = {}
+        self._counts = {}
+
+    @classmethod
+    def for_year(cls, year):
+        """Returns the (cached) calendar of the given year"""
+        if year not in cls._years:
+            cls._years[year] = cls(year)
+        return cls._years[year]
+
+    def days(self, weekdays):
+        """Returns the bitmask of dates falling on the given weekdays
+        (numbered like date.weekday(), as frequency_per_year always has)"""
+        if weekdays not in self._days:
+            days = 0
+            for (weekday, mask) in enumerate(self.weekdays):
+                if weekdays >> weekday & 1:
+                    days |= mask
+            self._days[weekdays] = days
+        return self._days[weekdays]
+
+    def count(self, months, doms, weekdays):
+        """Returns the number of dates matching all three bitmasks"""
+        key = (months, doms, weekdays)
+        if key not in self._counts:
+            spread = 0
+            for month in range(1, 13):
+                if months >> month & 1:
+                    spread |= doms << (month * 32)
+            self._counts[key] = bin(self.days(weekdays) & spread).count('1')
+        return self._counts[key]
+
+
 class SundayError(KeyError):
     """Sunday was specified as 7 instead of 0"""
     pass
@@ -913,21 +1477,50 @@ class Also(object):
 
 class CronSlice(object):
     """Cron slice object which shows a time pattern"""
+    __slots__ = ('info', 'parts', 'owner', '_mask')
+
     def __init__(self, info, value=None):
         if isinstance(info, int):
             info = S_INFO[info]
-        self.min = info.get('min', None)
-        self.max = info.get('max', None)
-        self.name = info.get('name', None)
-        self.enum = info.get('enum', None)
+        self.info = info
         self.parts = []
+        self.owner = None
+        self._mask = None
         if value:
             self.parse(value)
 
+    @property
+    def min(self):
+        """The lowest value of this slice"""
+        return self.info.get('min', None)
+
+    @property
+    def max(self):
+        """The highest value of this slice"""
+        return self.info.get('max', None)
+
+    @property
+    def name(self):
+        """The name of this slice"""
+        return self.info.get('name', None)
+
+    @property
+    def enum(self):
+        """The names of the values of this slice, if any"""
+        return self.info.get('enum', None)
+
+    def _changed(self):
+        """Forget the cached values and tell the owning slices"""
+        self._mask = None
+        if self.owner is not None:
+            self.owner.changed()
+
     def parse(self, value):
         """Set values into the slice."""
         self.parts = []
-        if value is None:
+        self._changed()
+        if value is None or str(value) == '*':
+            # A bare '*' has no parts, like a cleared slice
             return self.clear()
         for part in str(value).split(','):
             if part.find("/") > 0 or part.find("-") > 0 or part == '*':
@@ -965,6 +1558,7 @@ class CronSlice(object):
         """Set the every X units value"""
         if not also:
             self.clear()
+        self._changed()
         self.parts += self.get_range(int(n_value))
         return self.parts[-1]
 
@@ -972,6 +1566,7 @@ class CronSlice(object):
         """Set the time values to the specified placements."""
         if not opts.get('also', False):
             self.clear()
+        self._changed()
         for set_a in n_value:
             self.parts += self.parse_value(set_a, sunday=0),
         return self.parts
@@ -980,6 +1575,7 @@ class CronSlice(object):
         """Set the During value, which sets a range"""
         if not also:
             self.clear()
+        self._changed()
         self.parts += self.get_range(str(vfrom) + '-' + str(vto))
         return self.parts[-1]
 
@@ -991,6 +1587,21 @@ class CronSlice(object):
     def clear(self):
         """clear the slice ready for new vaues"""
         self.parts = []
+        self._changed()
+
+    def mask(self):
+        """Returns the values of this slice as an integer bitmask, bit n
+        set for value n. Cached until the slice is changed."""
+        if self._mask is None:
+            # An empty part means '*' which is every(1)
+            mask = 0 if self.parts else (2 << self.max) - (1 << self.min)
+            for part in self.parts:
+                if isinstance(part, CronRange):
+                    mask |= part.mask()
+                else:
+                    mask |= 1 << int(part)
+            self._mask = mask
+        return self._mask
 
     def get_range(self, *vrange):
         """Return a cron range for this slice"""
@@ -1001,22 +1612,20 @@ class CronSlice(object):
 
     def __iter__(self):
         """Return the entire element as an iterable"""
-        ret = {}
-        # An empty part means '*' which is every(1)
-        if not self.parts:
-            self.every(1)
-        for part in self.parts:
-            if isinstance(part, CronRange):
-                for bit in part.range():
-                    ret[bit] = 1
-            else:
-                ret[int(part)] = 1
-        for val in ret:
-            yield val
+        mask = self.mask()
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
 
     def __len__(self):
         """Returns the number of times this slice happens in it's range"""
-        return len(list(self.__iter__()))
+        return bin(self.mask()).count('1')
+
+    def __contains__(self, value):
+        """Returns true if this slice happens on the given value"""
+        value = int(value)
+        return value >= 0 and bool(self.mask() >> value & 1)
 
     def parse_value(self, val, sunday=None):
         """Parse the value of the cron slice and raise any errors needed"""
@@ -1090,6 +1699,8 @@ def _render(value, resolve=False):
 
 class CronRange(object):
     """A range between one value and another for a time range."""
+    __slots__ = ('dangling', 'slice', 'cron', 'seq', 'vfrom', 'vto')
+
     def __init__(self, vslice, *vrange):
         # holds an extra dangling entry, for example sundays.
         self.dangling = None
@@ -1161,6 +1772,18 @@ class CronRange(object):
     def every(self, value):
         """Set the sequence value for this range."""
         self.seq = int(value)
+        self.slice._changed()
+
+    def mask(self):
+        """Returns the values of this range as an integer bitmask"""
+        vfrom, vto = int(self.vfrom), int(self.vto)
+        if self.seq == 1:
+            mask = (2 << vto) - (1 << vfrom) if vto >= vfrom else 0
+        else:
+            mask = 0
+            for value in range(vfrom, vto + 1, self.seq):
+                mask |= 1 << value
+        return mask
 
     def __lt__(self, value):
         return int(self.vfrom) < int(value)
@@ -105,7 +105,25 @@ class CronTabsTestCase(unittest.TestCase):
         jobs = self.assertInTabs('an_command.sh', 'root')
         self.assertEqual(str(jobs[0].slices), AnacronSourceTab.slices)
         self.assertNotInTabs('not_command.txt')
-        
+
+    def test_30_all_order(self):
+        """Building all keeps the order of finds in each tab"""
+        first = crontab.CronTab(user=False, tab="1 * * * * root a # x\n2 * * * * root b # x\n")
+        second = crontab.CronTab(user=False, tab="3 * * * * root c # x\n")
+        saved = list(self.tabs)
+        self.tabs[:] = [second, first]
+        self.tabs._all = None
+        try:
+            self.assertEqual([job.command for job in self.tabs.all.find_comment('x')],
+                             ['c', 'a', 'b'])
+            first.new(command='d', comment='x', user='root')
+            self.assertEqual([job.command for job in first.find_comment('x')],
+                             ['a', 'b', 'd'])
+            self.assertEqual([job.command for job in first.find_time('1 * * * *')], ['a'])
+        finally:
+            self.tabs[:] = saved
+            self.tabs._all = None
+
 
 if __name__ == '__main__':
     test_support.run_unittest(CronTabsTestCase)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2016 Martin Owens
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3.0 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.
+#
+"""
+Test diffed writes, which skip rewriting an unchanged crontab.
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+
+sys.path.insert(0, '../')
+
+import unittest
+from crontab import CronTab
+try:
+    from test import test_support
+except ImportError:
+    from test import support as test_support
+
+START_TAB = """SHELL=/bin/sh
+# Hourly job
+0 * * * * other
+51 5 * * * fajr # rpiAdhanClockJob
+52 11 * * * dhuhr # rpiAdhanClockJob
+15 3 * * * update # rpiAdhanClockJob
+"""
+
+class DiffTestCase(unittest.TestCase):
+    """Test the content-diff write mode."""
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmp, 'crontab')
+        with open(self.filename, 'w') as fhl:
+            fhl.write(START_TAB)
+        os.utime(self.filename, (0, 0))
+        self.crontab = CronTab(tabfile=self.filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def rebuild(self, times):
+        """Replace the tagged jobs like updateAzaanTimers.py does"""
+        self.crontab.remove_all(comment='rpiAdhanClockJob')
+        for (minute, hour, command) in times:
+            job = self.crontab.new(command=command, comment='rpiAdhanClockJob')
+            job.setall(minute, hour)
+
+    def test_01_unchanged(self):
+        """Identical content is not written"""
+        self.rebuild([(51, 5, 'fajr'), (52, 11, 'dhuhr'), (15, 3, 'update')])
+        result = self.crontab.write(diff=True)
+        self.assertEqual(tuple(result), (0, 0, 4, False))
+        self.assertEqual(os.stat(self.filename).st_mtime, 0)
+
+    def test_02_changed(self):
+        """Changed jobs are counted and written"""
+        self.rebuild([(52, 5, 'fajr'), (52, 11, 'dhuhr'), (15, 3, 'update')])
+        result = self.crontab.write(diff=True)
+        self.assertEqual(tuple(result), (1, 1, 3, True))
+        self.assertNotEqual(os.stat(self.filename).st_mtime, 0)
+        self.assertIn('52 5 * * * fajr', open(self.filename).read())
+
+    def test_03_written_is_new_source(self):
+        """After a write, the next diff is against what was written"""
+        self.rebuild([(52, 5, 'fajr')])
+        self.assertTrue(self.crontab.write(diff=True).written)
+        os.utime(self.filename, (0, 0))
+        self.rebuild([(52, 5, 'fajr')])
+        self.assertEqual(tuple(self.crontab.write(diff=True)), (0, 0, 2, False))
+        self.assertEqual(os.stat(self.filename).st_mtime, 0)
+
+    def test_04_other_target(self):
+        """Writing unchanged content somewhere else still writes"""
+        other = os.path.join(self.tmp, 'other')
+        result = self.crontab.write(filename=other, diff=True)
+        self.assertTrue(result.written)
+        self.assertEqual(open(other).read(), self.crontab.render())
+
+    def test_05_env_change(self):
+        """Non-job changes are written without counting jobs"""
+        self.crontab.env['MAILTO'] = 'pi'
+        self.assertEqual(tuple(self.crontab.write(diff=True)), (0, 0, 4, True))
+
+    def test_06_diff(self):
+        """Diff without writing"""
+        self.crontab.new(command='isha').setall(40, 19)
+        self.assertEqual(tuple(self.crontab.diff()), (1, 0, 4, False))
+        self.assertEqual(len(list(self.crontab.find_command('isha'))), 1)
+
+    def test_07_file_changed(self):
+        """A file source is compared as it is when diffing"""
+        with open(self.filename, 'w') as fhl:
+            fhl.write(START_TAB.replace('51 5', '50 5'))
+        self.assertEqual(tuple(self.crontab.diff()), (1, 1, 3, False))
+        os.unlink(self.filename)
+        self.assertTrue(self.crontab.write(diff=True).written)
+        self.assertEqual(open(self.filename).read(), self.crontab.render())
+
+
+if __name__ == '__main__':
+    test_support.run_unittest(
+       DiffTestCase,
+    )
@@ -155,6 +155,27 @@ class FrequencyTestCase(unittest.TestCase):
         job.setall("*/2 * * * *")
         self.assertEqual(job.frequency_per_hour(), 30)
 
+    def test_17_leap_days(self):
+        """Days that only some years have"""
+        self.job.setall("0 0 29 2 *")
+        self.assertEqual(self.job.frequency_per_year(year=2010), 0)
+        self.assertEqual(self.job.frequency_per_year(year=2012), 1)
+        self.job.setall("0 0 31 * *")
+        self.assertEqual(self.job.frequency_per_year(year=2010), 7)
+
+    def test_18_report(self):
+        """Frequency of every job at once"""
+        self.job.setall("0 0 1 * *")
+        self.crontab.new(command='hourly').setall("0 * * * *")
+        self.crontab.new(command='weekdays').setall("30 5 * * MON-WED")
+        report = self.crontab.frequency_report(2010)
+        self.assertEqual([row.job.command for row in report],
+                         ['freq', 'hourly', 'weekdays'])
+        self.assertEqual([tuple(row)[1:] for row in report],
+                         [(12, 1, 12), (365, 24, 8760), (156, 1, 156)])
+        for row in report:
+            self.assertEqual(row.total, row.job.frequency(2010))
+
 if __name__ == '__main__':
     test_support.run_unittest(
        FrequencyTestCase,
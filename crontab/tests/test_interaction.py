@@ -25,7 +25,7 @@ import sys
 sys.path.insert(0, '../')
 
 import unittest
-from crontab import CronTab, CronSlices, CronSlice, PY3
+from crontab import CronTab, CronItem, CronSlices, CronSlice, PY3
 try:
     from test import test_support
 except ImportError:
@@ -314,5 +314,62 @@ class InteractionTestCase(unittest.TestCase):
         self.assertEqual(list(self.crontab.comments),
                          ['Comment One', 'Comment  Two', 're-id'])
 
+    def test_29_find_changed(self):
+        """Find jobs after their comment, time and command change"""
+        job = list(self.crontab.find_command('spaced'))[0]
+        self.assertEqual(list(self.crontab.find_time('0 5 * * *')), [job])
+        job.set_comment('moved')
+        job.minute.on(15)
+        job.set_command('moved spaced')
+        self.assertEqual(list(self.crontab.find_comment('Comment  Two')), [])
+        self.assertEqual(list(self.crontab.find_comment('moved')), [job])
+        self.assertEqual(list(self.crontab.find_time('0 5 * * *')), [])
+        self.assertEqual(list(self.crontab.find_time('15 5 * * *')), [job])
+        self.assertEqual(list(self.crontab.find_command('ved spa')), [job])
+        job.setall('@reboot')
+        self.assertEqual([j.command for j in self.crontab.find_time('@reboot')],
+                         ['moved spaced', 'rebooted'])
+
+    def test_30_find_order(self):
+        """Found jobs come in tab order, and removed jobs are gone"""
+        first = self.crontab.new(command='spaced out', comment='re-id')
+        first.setall('0 5 * * *')
+        self.assertEqual([j.command for j in self.crontab.find_command('spaced')],
+                         ['spaced', 'spaced out'])
+        self.assertEqual([j.command for j in self.crontab.find_comment('re-id')],
+                         ['rebooted', 'spaced out'])
+        self.crontab.remove_all(time='0 5 * * *')
+        self.assertEqual(list(self.crontab.find_command('spaced')), [])
+        self.assertEqual([j.command for j in self.crontab.find_comment('re-id')],
+                         ['rebooted'])
+        self.assertEqual(list(self.crontab.find_command('')), list(self.crontab))
+
+    def test_31_find_appended(self):
+        """Jobs made outside a tab are found after they change"""
+        job = CronItem(command='outside', comment='x')
+        self.crontab.append(job)
+        self.assertEqual(job.cron, self.crontab)
+        job.set_comment('y')
+        self.assertEqual(list(self.crontab.find_comment('x')), [])
+        self.assertEqual(list(self.crontab.find_comment('y')), [job])
+        job.setall('5 4 * * *')
+        job.minute.on(3)
+        self.assertEqual(list(self.crontab.find_time('3 4 * * *')), [job])
+        job.set_command('moved outside')
+        self.assertEqual(list(self.crontab.find_command('moved out')), [job])
+
+    def test_32_find_shared(self):
+        """Jobs held by two tabs are indexed by both"""
+        other = CronTab(tab='')
+        job = self.crontab.new(command='shared', comment='x')
+        other.append(job)
+        self.crontab.new(command='later', comment='x')
+        job.set_comment('y')
+        self.assertEqual(list(other.find_comment('y')), [job])
+        self.assertEqual([j.command for j in self.crontab.find_comment('x')], ['later'])
+        other.remove(job)
+        self.assertEqual(list(other.find_comment('y')), [])
+        self.assertEqual(list(self.crontab.find_comment('y')), [job])
+
 if __name__ == '__main__':
     test_support.run_unittest(InteractionTestCase)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2016 Martin Owens
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3.0 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.
+#
+"""
+Test the memory used per job when parsing a large crontab.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, '../')
+
+import unittest
+import crontab
+from crontab import CronTab, CronItem, CronSlice, CronRange
+try:
+    from test import test_support
+except ImportError:
+    from test import support as test_support
+
+JOBS = 5000
+SLOTTED = ('CronItem', 'CronSlice', 'CronRange')
+
+
+def unslotted(cls):
+    """Copy of a class without its __slots__, keeping an instance dict"""
+    namespace = dict((key, value) for (key, value) in vars(cls).items()
+                     if key != '__slots__' and key not in cls.__slots__)
+    return type(cls.__name__, cls.__bases__, namespace)
+
+
+class MemoryTestCase(unittest.TestCase):
+    """Measure parsing with tracemalloc"""
+    def setUp(self):
+        try:
+            import tracemalloc
+        except ImportError:
+            self.skipTest("tracemalloc not available")
+        self.tracemalloc = tracemalloc
+        self.tab = '\n'.join('%d %d * * * /usr/bin/job%d --flag # id%d'
+                             % (i % 60, i % 24, i, i) for i in range(JOBS))
+
+    def bytes_per_job(self, slots=True, **kwargs):
+        saved = dict((name, getattr(crontab, name)) for name in SLOTTED)
+        if not slots:
+            for (name, cls) in saved.items():
+                setattr(crontab, name, unslotted(cls))
+        self.tracemalloc.start()
+        try:
+            tab = CronTab(**kwargs)
+            (current, _) = self.tracemalloc.get_traced_memory()
+        finally:
+            self.tracemalloc.stop()
+            for (name, cls) in saved.items():
+                setattr(crontab, name, cls)
+        self.assertEqual(len(tab), JOBS)
+        return current / float(JOBS)
+
+    def test_01_slots(self):
+        """Jobs, slices and ranges have no instance dict"""
+        for cls in (CronItem, CronSlice, CronRange):
+            self.assertTrue(hasattr(cls, '__slots__'))
+        self.assertFalse(hasattr(CronTab(tab=self.tab[:40])[0], '__dict__'))
+
+    def test_02_per_job(self):
+        """Bytes per job when reading a string, against instance dicts"""
+        used = self.bytes_per_job(tab=self.tab)
+        before = self.bytes_per_job(slots=False, tab=self.tab)
+        sys.stderr.write("\n%.0f bytes per job (%.0f with dicts) " % (used, before))
+        self.assertLess(used, before)
+
+    def test_03_per_job_file(self):
+        """Reading a file does not keep its text"""
+        filename = os.path.join(os.path.dirname(__file__), 'data', 'memory.tab')
+        with open(filename, 'w') as fhl:
+            fhl.write(self.tab)
+        try:
+            used = self.bytes_per_job(tabfile=filename)
+        finally:
+            os.unlink(filename)
+        line = len(self.tab) / float(JOBS)
+        self.assertLess(used, self.bytes_per_job(tab=self.tab) + line / 2)
+
+
+if __name__ == '__main__':
+    test_support.run_unittest(
+       MemoryTestCase,
+    )
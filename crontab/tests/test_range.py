@@ -89,6 +89,31 @@ class RangeTestCase(unittest.TestCase):
             v = str(CronSlice(4, a))
             self.assertEqual(v, b, "%s != %s, from %s" % (v, b, a))
 
+    def test_06_values(self):
+        """Values, length and membership of a slice"""
+        vslice = CronSlice(0, '50-55/2,5,*/20')
+        self.assertEqual(list(vslice), [0, 5, 20, 40, 50, 52, 54])
+        self.assertEqual(len(vslice), 7)
+        self.assertIn(52, vslice)
+        self.assertNotIn(53, vslice)
+        self.assertEqual(len(CronSlice(4, '5-7')), 3)
+        self.assertEqual(len(CronSlice(2)), 31)
+
+    def test_07_changed(self):
+        """Values follow changes to a slice"""
+        vslice = CronSlice(1, '1-10')
+        self.assertEqual(len(vslice), 10)
+        vslice.during(1, 10).every(3)
+        self.assertEqual(list(vslice), [1, 4, 7, 10])
+        vslice.also.on(2)
+        self.assertEqual(list(vslice), [1, 2, 4, 7, 10])
+        vslice.every(12)
+        self.assertEqual(list(vslice), [0, 12])
+        vslice.parse('5')
+        self.assertEqual(list(vslice), [5])
+        vslice.clear()
+        self.assertEqual(len(vslice), 24)
+
 if __name__ == '__main__':
     test_support.run_unittest(
        RangeTestCase,
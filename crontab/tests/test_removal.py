@@ -115,6 +115,24 @@ class RemovalTestCase(unittest.TestCase):
             self.assertEqual(len(crontab), 0)
             self.assertEqual(str(crontab), '')
 
+    def test_09_remove_many(self):
+        """Remove several items at once"""
+        crontab = CronTab(tab=START_TAB.lstrip() + "# After\n")
+        (first, second, third) = crontab.crons
+        self.assertEqual(crontab.remove(third, first, first), 2)
+        self.assertEqual(crontab.crons, [second])
+        self.assertEqual(unicode(crontab),
+                         "2 * * * * command2 # CommentID AAB\n# After\n")
+        self.assertEqual(crontab.remove(first), 0)
+
+    def test_10_remove_last(self):
+        """Removing the last item drops the trailing line feed"""
+        crontab = CronTab(tab=START_TAB.lstrip())
+        self.assertEqual(crontab.lines[-1], '')
+        crontab.remove_all(comment='CommentID B3')
+        self.assertNotEqual(crontab.lines[-1], '')
+        self.assertEqual(len(crontab.render()), 68)
+
     def get_new_file(self, name):
         """Gets a filename and records it for deletion"""
         this_dir = os.path.dirname(__file__)
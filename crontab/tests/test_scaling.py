@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2016 Martin Owens
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3.0 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.
+#
+"""
+Test that listing the unique values of large tabs scales linearly, by
+counting the comparisons made between values.
+"""
+
+import sys
+
+sys.path.insert(0, '../')
+
+import unittest
+from crontab import CronTab
+try:
+    from test import test_support
+except ImportError:
+    from test import support as test_support
+
+JOBS = 4000
+
+
+class Counted(str):
+    """A string that counts how often it is hashed or compared"""
+    calls = 0
+
+    def __hash__(self):
+        Counted.calls += 1
+        return str.__hash__(self)
+
+    def __eq__(self, other):
+        Counted.calls += 1
+        return str.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+
+class ScalingTestCase(unittest.TestCase):
+    """Count the work done by the unique value views"""
+    def setUp(self):
+        # Every value is used by two jobs, as distinct but equal strings
+        self.tab = CronTab(user=False, tab='\n'.join(
+            '%d * * * * user command # id%d' % (i % 60, i) for i in range(JOBS)))
+        for (i, job) in enumerate(self.tab.crons):
+            job.command = Counted('command%d' % (i // 2))
+            job.comment = Counted('id%d' % (i // 2))
+            job.user = Counted('user%d' % (i // 2))
+        Counted.calls = 0
+
+    def assertLinear(self, name):
+        self.assertEqual(len(list(getattr(self.tab, name))), JOBS // 2)
+        # A linear scan with a set is about two calls per job, comparing
+        # with every value seen before would be about JOBS * JOBS / 4
+        self.assertLess(Counted.calls, JOBS * 3,
+                        "%s made %d comparisons" % (name, Counted.calls))
+
+    def test_01_commands(self):
+        """Unique commands"""
+        self.assertLinear('commands')
+
+    def test_02_comments(self):
+        """Unique comments"""
+        self.assertLinear('comments')
+
+    def test_03_users(self):
+        """Unique users"""
+        self.assertLinear('users')
+
+
+if __name__ == '__main__':
+    test_support.run_unittest(
+       ScalingTestCase,
+    )
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2016 Martin Owens
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 3.0 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.
+#
+"""
+Test the native (croniter free) next and previous run times.
+"""
+
+import sys
+from datetime import datetime
+
+sys.path.insert(0, '../')
+
+import unittest
+from crontab import CronSlices
+try:
+    from test import test_support
+except ImportError:
+    from test import support as test_support
+
+
+class ScheduleTestCase(unittest.TestCase):
+    """Test CronSlices.schedule()"""
+    def assertNext(self, pattern, date_from, *expected):
+        schedule = CronSlices(pattern).schedule(datetime(*date_from))
+        for value in expected:
+            self.assertEqual(schedule.get_next(), datetime(*value))
+
+    def assertPrev(self, pattern, date_from, *expected):
+        schedule = CronSlices(pattern).schedule(datetime(*date_from))
+        for value in expected:
+            self.assertEqual(schedule.get_prev(), datetime(*value))
+
+    def test_01_next(self):
+        """Get Next Scheduled Items"""
+        self.assertNext('20 * * * *', (2000, 10, 11, 5, 12, 10),
+                        (2000, 10, 11, 5, 20), (2000, 10, 11, 6, 20))
+
+    def test_02_prev(self):
+        """Get Prev Scheduled Items"""
+        self.assertPrev('20 * * * *', (2001, 10, 11, 1, 12, 10),
+                        (2001, 10, 11, 0, 20), (2001, 10, 10, 23, 20))
+
+    def test_03_current(self):
+        """Get Current Item"""
+        schedule = CronSlices('20 * * * *').schedule(datetime(2001, 1, 1, 1, 12))
+        self.assertEqual(schedule.get_current(), datetime(2001, 1, 1, 1, 12))
+
+    def test_04_exact(self):
+        """A matching start time is not returned again"""
+        self.assertNext('0 12 * * *', (2020, 5, 1, 12, 0), (2020, 5, 2, 12, 0))
+        self.assertPrev('0 12 * * *', (2020, 5, 1, 12, 0), (2020, 4, 30, 12, 0))
+
+    def test_05_month_end(self):
+        """Step over short months and years"""
+        self.assertNext('30 6 31 * *', (2021, 1, 31, 7, 0),
+                        (2021, 3, 31, 6, 30), (2021, 5, 31, 6, 30))
+        self.assertNext('0 0 29 2 *', (2021, 1, 1), (2024, 2, 29), (2028, 2, 29))
+        self.assertPrev('0 0 1 1 *', (2021, 1, 1), (2020, 1, 1))
+
+    def test_06_dow(self):
+        """Day of week with and without day of month"""
+        # 2024-03-01 is a Friday
+        self.assertNext('0 9 * * 1', (2024, 3, 1), (2024, 3, 4, 9), (2024, 3, 11, 9))
+        self.assertNext('0 9 * * 7', (2024, 3, 1), (2024, 3, 3, 9))
+        # Both restricted: either one matches
+        self.assertNext('0 9 15 * 1', (2024, 3, 1),
+                        (2024, 3, 4, 9), (2024, 3, 11, 9), (2024, 3, 15, 9))
+        self.assertPrev('0 9 15 * 1', (2024, 3, 4), (2024, 2, 26, 9))
+
+    def test_07_adhan(self):
+        """Jobs pinned to days of a month"""
+        self.assertNext('51 5 18,19 10 *', (2024, 10, 18, 5, 51),
+                        (2024, 10, 19, 5, 51), (2025, 10, 18, 5, 51))
+
+    def test_08_never(self):
+        """Impossible dates raise"""
+        schedule = CronSlices('0 0 30 2 *').schedule(datetime(2020, 1, 1))
+        with self.assertRaises(ValueError):
+            schedule.get_next()
+
+    def test_09_croniter(self):
+        """Same answers as croniter"""
+        try:
+            from croniter import croniter
+        except ImportError:
+            self.skipTest("Croniter not installed")
+        start = datetime(2023, 6, 15, 13, 45, 30)
+        for pattern in ('*/7 */5 * * *', '0 4 1-7 * 0', '15 3,15 */3 2-11 *',
+                        '0 0 13 * 5', '59 23 31 12 *', '@weekly', '5 0 * 8 *'):
+            native = CronSlices(pattern).schedule(start)
+            other = croniter(CronSlices(pattern).clean_render(), start)
+            for _ in range(20):
+                self.assertEqual(native.get_next(), other.get_next(datetime))
+            native = CronSlices(pattern).schedule(start)
+            other = croniter(CronSlices(pattern).clean_render(), start)
+            for _ in range(20):
+                self.assertEqual(native.get_prev(), other.get_prev(datetime))
+
+    def test_10_day_or(self):
+        """Only a bare '*' leaves the other day field alone"""
+        self.assertNext('32-44 15 16 * 0-6', (2025, 9, 12, 19, 23), (2025, 9, 13, 15, 32))
+        self.assertNext('32-44 15 16 * *', (2025, 9, 12, 19, 23), (2025, 9, 16, 15, 32))
+        slices = CronSlices('0 9 * * *')
+        slices[2].on(16)
+        self.assertEqual(slices.schedule(datetime(2025, 9, 12)).get_next(),
+                         datetime(2025, 9, 16, 9))
+        try:
+            from croniter import croniter
+        except ImportError:
+            self.skipTest("Croniter not installed")
+        start = datetime(2025, 9, 12, 19, 23)
+        for pattern in ('32-44 15 16 * 0-6', '0 9 1-31 * 1', '0 9 */1 * 1',
+                        '0 9 */2 * 1', '0 9 16 * *', '0 9 * * 0-6', '0 9 16 * */1'):
+            native = CronSlices(pattern).schedule(start)
+            other = croniter(pattern, start)
+            for _ in range(10):
+                self.assertEqual(native.get_next(), other.get_next(datetime), pattern)
+
+
+if __name__ == '__main__':
+    test_support.run_unittest(
+       ScheduleTestCase,
+    )
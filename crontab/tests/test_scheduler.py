@@ -29,6 +29,7 @@ import crontab
 import logging
 import string
 import random
+import threading
 
 try:
     from StringIO import StringIO
@@ -50,10 +51,6 @@ class SchedulerTestCase(unittest.TestCase):
     """Test scheduling functions of CronTab."""
     def setUp(self):
         self.tab = crontab.CronTab()
-        try:
-            import croniter
-        except ImportError:
-            self.skipTest("Croniter not installed")
 
         self.handlers = []
         self.log = crontab.LOG
@@ -105,5 +102,49 @@ class SchedulerTestCase(unittest.TestCase):
         """Every Ten Minutes"""
         self.assertSchedule("*/10 * * * *", 12, 1)
 
+    def test_05_schedule_many(self):
+        """Several jobs share one queue"""
+        self.tab.new(command=COMMAND + 'A').setall("* * * * *")
+        self.tab.new(command=COMMAND + 'B').setall("*/2 * * * *")
+        self.tab.new(command=COMMAND + 'C').enable(False)
+        ret = list(self.tab.run_scheduler(7, cadence=0.01, warp=True))
+        self.assertEqual(ret.count('-h|A'), 6)
+        self.assertEqual(ret.count('-h|B'), 3)
+        self.assertEqual(len(ret), 9)
+
+    def test_06_schedule_none(self):
+        """No timeout, no runs"""
+        self.tab.new(command=COMMAND + 'A').setall("* * * * *")
+        self.assertEqual(list(self.tab.run_scheduler(0, cadence=0.01, warp=True)), [])
+
+    def test_07_schedule_forever(self):
+        """Without jobs and timeout the scheduler waits for new jobs"""
+        self.tab.new(command=COMMAND + 'A').enable(False)
+        added = threading.Timer(0.1, lambda: self.tab.new(command=COMMAND + 'B'))
+        added.start()
+        try:
+            ret = next(self.tab.run_scheduler(-1, cadence=0.01, warp=True))
+        finally:
+            added.cancel()
+        self.assertEqual(ret, '-h|B')
+
+    def test_08_schedule_changes(self):
+        """Jobs changed while running are rescheduled"""
+        job_a = self.tab.new(command=COMMAND + 'A')
+        job_b = self.tab.new(command=COMMAND + 'B')
+        job_b.enable(False)
+        ret = []
+        for value in self.tab.run_scheduler(12, cadence=0.01, warp=True):
+            ret.append(value)
+            if len(ret) == 2:
+                self.tab.remove(job_a)
+                job_b.enable()
+                job_b.setall("*/2 * * * *")
+                self.tab.new(command=COMMAND + 'C').setall("*/5 * * * *")
+        self.assertEqual(ret[:2], ['-h|A', '-h|A'])
+        self.assertNotIn('-h|A', ret[2:])
+        self.assertIn(ret[2:].count('-h|B'), (4, 5))
+        self.assertIn(ret[2:].count('-h|C'), (1, 2))
+
 if __name__ == '__main__':
     test_support.run_unittest(SchedulerTestCase)
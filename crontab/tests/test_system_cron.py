@@ -131,6 +131,12 @@ JAR=bar
         crontab = CronTab(user=False, tabfile=TEST_FILE)
         self.assertEqual(repr(crontab), "<System CronTab '%s'>" % TEST_FILE)
 
+    def test_11_users(self):
+        """Unique users of the jobs"""
+        self.crontab.new(command='release_brian', user='pontus')
+        self.crontab.new(command='stone_him', user='palin')
+        self.assertEqual(list(self.crontab.users), ['palin', 'pontus'])
+
 if __name__ == '__main__':
     test_support.run_unittest(
        SystemCronTestCase,
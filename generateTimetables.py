@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""Generate yearly prayer timetables for many locations and methods at once."""
+
+import argparse
+import csv
+import datetime
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from os.path import dirname, abspath
+
+root_dir = dirname(abspath(__file__))
+sys.path.insert(0, root_dir)
+
+from praytimes import PrayTimes
+
+TIME_NAMES = ['imsak', 'fajr', 'sunrise', 'dhuhr', 'asr', 'sunset', 'maghrib', 'isha', 'midnight']
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Generate yearly prayer timetables for a list of locations')
+    parser.add_argument('locations', help='JSON file with a list of {name, lat, lng, [elv], timezone, [methods]} objects')
+    parser.add_argument('--year', type=int, default=datetime.date.today().year, help='Year to generate (default: this year)')
+    parser.add_argument('--method', dest='methods', action='append',
+                        help='Calculation method, may be repeated (default: MWL, or each location\'s "methods")')
+    parser.add_argument('-o', '--output', default='-', help='Output file (default: stdout)')
+    parser.add_argument('--format', choices=('csv', 'json', 'jsonl'),
+                        help='Output format (default: from a .json or .jsonl output file extension, else csv)')
+    parser.add_argument('--time-format', choices=('24h', '12h', 'Minutes'), default='24h',
+                        help='Time format: HH:MM, 12-hour or integer minutes since midnight (default: 24h)')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help='Worker processes (default: CPU count)')
+    return parser.parse_args(argv)
+
+
+def load_locations(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        locations = json.load(f)
+    if not isinstance(locations, list):
+        raise ValueError('Locations file must contain a JSON list')
+    for i, loc in enumerate(locations):
+        if not isinstance(loc, dict) or loc.get('lat') is None or loc.get('lng') is None:
+            raise ValueError(f'Location #{i + 1} needs at least "lat" and "lng"')
+        for key, limit in (('lat', 90), ('lng', 180)):
+            value = loc[key]
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not -limit <= value <= limit:
+                raise ValueError(f'Location #{i + 1} has an invalid "{key}" (must be a number -{limit} to {limit}): {value!r}')
+        if loc.get('timezone') is None:
+            raise ValueError(f'Location #{i + 1} needs a "timezone" (UTC offset in hours or IANA name)')
+        check_timezone(loc['timezone'], f'Location #{i + 1}')
+        loc.setdefault('name', f'{loc["lat"]},{loc["lng"]}')
+    return locations
+
+
+def check_timezone(timezone, where):
+    """Raise ValueError unless timezone is a UTC offset in hours or a known
+    IANA name, so that bad input fails before any worker starts."""
+    if isinstance(timezone, (int, float)) and not isinstance(timezone, bool):
+        if not -14 <= timezone <= 14:
+            raise ValueError(f'{where} has an invalid "timezone" (UTC offset must be -14 to 14 hours): {timezone!r}')
+        return
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+    try:
+        ZoneInfo(timezone)
+    except (ZoneInfoNotFoundError, ValueError, TypeError):
+        raise ValueError(f'{where} has an unknown "timezone" (UTC offset in hours or IANA name): {timezone!r}')
+
+
+def utc_offsets(timezone, year):
+    """Return a function giving the UTC offset in hours for each day of the year."""
+    if isinstance(timezone, (int, float)):
+        return lambda day: float(timezone)
+    from zoneinfo import ZoneInfo
+    zone = ZoneInfo(timezone)
+    # Prayers happen during the day, so noon gives the offset that applies
+    return lambda day: datetime.datetime(day.year, day.month, day.day, 12, tzinfo=zone).utcoffset().total_seconds() / 3600
+
+
+def compute_year(location, method, year, time_format='24h'):
+    """Worker: compute every day of a year for one location and method."""
+    pt = PrayTimes(method)
+    coords = (location['lat'], location['lng'], location.get('elv', 0))
+    offset = utc_offsets(location['timezone'], year)
+    day = datetime.date(year, 1, 1)
+    rows = []
+    while day.year == year:
+        times = pt.getTimes(day, coords, offset(day), 0, time_format)
+        row = {'location': location['name'], 'method': method, 'date': day.isoformat()}
+        row.update((name, times[name]) for name in TIME_NAMES)
+        rows.append(row)
+        day += datetime.timedelta(days=1)
+    return rows
+
+
+class RowWriter(object):
+    """Write timetable rows as CSV, a JSON array or JSON Lines."""
+    def __init__(self, fileh, fmt):
+        self.fileh = fileh
+        self.fmt = fmt
+        self.rows = 0
+        self.csv = csv.DictWriter(fileh, ['location', 'method', 'date'] + TIME_NAMES) if fmt == 'csv' else None
+        if self.csv:
+            self.csv.writeheader()
+        elif fmt == 'json':
+            fileh.write('[')
+
+    def write(self, rows):
+        if self.csv:
+            self.csv.writerows(rows)
+        else:
+            for row in rows:
+                text = json.dumps(row, ensure_ascii=False)
+                if self.fmt == 'json':
+                    self.fileh.write((',\n' if self.rows else '\n') + text)
+                else:
+                    self.fileh.write(text + '\n')
+                self.rows += 1
+        self.fileh.flush()
+
+    def close(self):
+        """Finish the output; a JSON array is only complete after this."""
+        if self.fmt == 'json':
+            self.fileh.write('\n]\n')
+            self.fileh.flush()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        locations = load_locations(args.locations)
+    except (OSError, ValueError) as e:
+        print(f'Error: {e}', file=sys.stderr)
+        sys.exit(1)
+
+    tasks = []
+    for loc in locations:
+        for method in args.methods or loc.get('methods') or ['MWL']:
+            if method not in PrayTimes.methods:
+                print(f'Error: Unknown method {method!r} for {loc["name"]}', file=sys.stderr)
+                sys.exit(1)
+            tasks.append((loc, method))
+
+    extension = os.path.splitext(args.output)[1].lower()
+    fmt = args.format or {'.json': 'json', '.jsonl': 'jsonl'}.get(extension, 'csv')
+    fileh = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8', newline='')
+    writer = RowWriter(fileh, fmt)
+
+    days = 0
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+            futures = [pool.submit(compute_year, loc, method, args.year, args.time_format) for loc, method in tasks]
+            for future in as_completed(futures):
+                rows = future.result()
+                writer.write(rows)
+                days += len(rows)
+        writer.close()
+    finally:
+        if fileh is not sys.stdout:
+            fileh.close()
+
+    elapsed = time.perf_counter() - start
+    print(f'Computed {days} days for {len(tasks)} location/method pairs in {elapsed:.2f}s '
+          f'({days / elapsed if elapsed else 0:.0f} days/s, {max(1, args.jobs)} workers)', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,66 +3,525 @@
 
 import argparse
 import asyncio
+import base64
+import hashlib
+import heapq
 import json
+import math
+import os
 import sys
-from mawaqit import AsyncMawaqitClient
+import time
+import aiohttp
+from mawaqit.exceptions import BadCredentialsException, MawaqitException, NotFoundException
 
+from updateAzaanTimers import mawaqit_sidecar_path, write_mawaqit_sidecar
 
-async def cmd_nearby(username, password, lat, lng):
+
+API_URL = 'https://mawaqit.net/api'
+
+# Per output directory: hash, ETag and fetch time of each generated mosque
+MANIFEST_NAME = '.mawaqit-manifest.json'
+
+# API tokens are reused between runs for this long, unless rejected earlier
+TOKEN_CACHE = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+                           'adhan', 'mawaqit-token.json')
+TOKEN_MAX_AGE = 7 * 24 * 3600
+
+# Mosques seen in nearby/search results, for `nearby --offline`
+MOSQUE_INDEX = os.path.join(os.path.dirname(TOKEN_CACHE), 'mosques.json')
+EARTH_RADIUS_KM = 6371.0
+
+
+class TokenCache:
+    """API tokens kept between runs in a file that only the user can read.
+
+    Tokens are stored per username and API URL with their expiry time. A
+    cache file that other users can read or write is ignored.
+    """
+
+    def __init__(self, path=TOKEN_CACHE, max_age=TOKEN_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                if os.fstat(f.fileno()).st_mode & 0o077:
+                    return {}
+                tokens = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return tokens if isinstance(tokens, dict) else {}
+
+    def _save(self, tokens):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        tmp = f'{self.path}.{os.getpid()}.tmp'
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(tokens, f)
+        os.replace(tmp, self.path)
+
+    def get(self, key):
+        entry = self._load().get(key)
+        if isinstance(entry, dict) and entry.get('expires', 0) > time.time():
+            return entry.get('token')
+        return None
+
+    def put(self, key, token):
+        tokens = self._load()
+        now = time.time()
+        tokens = dict((k, v) for k, v in tokens.items()
+                      if isinstance(v, dict) and v.get('expires', 0) > now)
+        tokens[key] = {'token': token, 'expires': now + self.max_age}
+        self._save(tokens)
+
+    def discard(self, key, token):
+        tokens = self._load()
+        if tokens.get(key, {}).get('token') == token:
+            del tokens[key]
+            self._save(tokens)
+
+
+class MosqueIndex:
+    """Local copy of the mosques returned by the API, with a spatial index.
+
+    The file maps each UUID to its name, address and coordinates. Queries
+    go through a KD-tree over the mosques' positions as 3-d unit vectors,
+    where straight-line (chord) distance orders points the same way as
+    great-circle distance, so nearest neighbours are exact.
+    """
+
+    FIELDS = ('uuid', 'name', 'localisation', 'latitude', 'longitude')
+
+    def __init__(self, path=MOSQUE_INDEX):
+        self.path = path
+        self.mosques = {}
+        self._tree = None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                mosques = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(mosques, dict):
+            self.mosques = mosques
+
+    def __len__(self):
+        return len(self.mosques)
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        write_file_atomic(self.path, json.dumps(self.mosques, ensure_ascii=False, sort_keys=True).encode('utf-8'))
+
+    def merge(self, mosques):
+        """Add or update mosques from API results; returns (added, updated).
+
+        Results without a UUID or coordinates are skipped.
+        """
+        added = updated = 0
+        for m in mosques:
+            try:
+                entry = dict((key, m.get(key)) for key in self.FIELDS)
+                entry['latitude'] = float(entry['latitude'])
+                entry['longitude'] = float(entry['longitude'])
+            except (TypeError, ValueError):
+                continue
+            if not entry['uuid']:
+                continue
+            old = self.mosques.get(entry['uuid'])
+            if old == entry:
+                continue
+            if old is None:
+                added += 1
+            else:
+                updated += 1
+            self.mosques[entry['uuid']] = entry
+            self._tree = None
+        return added, updated
+
+    @staticmethod
+    def _point(lat, lng):
+        lat, lng = math.radians(lat), math.radians(lng)
+        return (math.cos(lat) * math.cos(lng), math.cos(lat) * math.sin(lng), math.sin(lat))
+
+    def _build(self, items, depth=0):
+        """KD-tree node as (point, mosque, axis, left, right), or None."""
+        if not items:
+            return None
+        axis = depth % 3
+        items.sort(key=lambda item: item[0][axis])
+        mid = len(items) // 2
+        return (items[mid][0], items[mid][1], axis,
+                self._build(items[:mid], depth + 1), self._build(items[mid + 1:], depth + 1))
+
+    def nearest(self, lat, lng, k=5, radius_km=None):
+        """Return up to k (distance km, mosque) pairs nearest to a point,
+        closest first, optionally only those within radius_km."""
+        if k < 1:
+            return []
+        if self._tree is None:
+            self._tree = self._build([(self._point(m['latitude'], m['longitude']), m)
+                                      for m in self.mosques.values()])
+        target = tx, ty, tz = self._point(lat, lng)
+        # Squared chord length of the search radius, then of the k-th best
+        limit = float('inf')
+        if radius_km is not None:
+            limit = (2 * math.sin(min(radius_km / EARTH_RADIUS_KM, math.pi) / 2)) ** 2
+        best = []  # Max-heap of (-squared chord, tie, mosque)
+        stack = [(self._tree, 0.0)]
+        while stack:
+            node, gap = stack.pop()
+            if node is None or gap > limit:
+                continue
+            (x, y, z), mosque, axis, left, right = node
+            d2 = (x - tx) ** 2 + (y - ty) ** 2 + (z - tz) ** 2
+            if d2 <= limit:
+                heapq.heappush(best, (-d2, id(mosque), mosque))
+                if len(best) > k:
+                    heapq.heappop(best)
+                if len(best) == k:
+                    limit = -best[0][0]
+            diff = target[axis] - node[0][axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            stack.append((far, diff * diff))
+            stack.append((near, 0.0))
+        return [(2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(-d2) / 2)), mosque)
+                for d2, _, mosque in sorted(best, reverse=True)]
+
+
+class MawaqitAPI:
+    """Mawaqit API calls sharing one session and one token.
+
+    Uses the same endpoints as AsyncMawaqitClient, but logs in once for
+    any number of concurrent requests and takes the base URL as a
+    parameter, so it can be pointed at a local stub server. With a
+    TokenCache, the token of a previous run is used without logging in,
+    and a new one is fetched if the API rejects it.
+    """
+
+    def __init__(self, username, password, api_url=API_URL, concurrency=8, timeout=60, token_cache=None):
+        self.username = username
+        self.password = password
+        self.api_url = api_url.rstrip('/')
+        self.token = None
+        self.token_cache = token_cache
+        self._cache_key = f'{username} {self.api_url}'
+        self._login_lock = asyncio.Lock()
+        self._login_error = None
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=concurrency),
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        )
+
+    async def close(self):
+        await self.session.close()
+
+    async def login(self):
+        credentials = base64.b64encode(f'{self.username}:{self.password}'.encode('utf-8')).decode('ascii')
+        headers = {'Authorization': f'Basic {credentials}'}
+        async with self.session.post(f'{self.api_url}/2.0/me', headers=headers) as response:
+            raise_for_status(response, 'User')
+            self.token = (await response.json(content_type=None))['apiAccessToken']
+        return self.token
+
+    async def get_api_token(self):
+        """Log in on first use only, once for all concurrent callers."""
+        async with self._login_lock:
+            if self._login_error is not None:
+                raise self._login_error
+            if self.token is None and self.token_cache is not None:
+                self.token = self.token_cache.get(self._cache_key)
+            if self.token is None:
+                try:
+                    await self.login()
+                except BadCredentialsException as e:
+                    self._login_error = e  # Do not retry once per mosque
+                    raise
+                if self.token_cache is not None:
+                    self.token_cache.put(self._cache_key, self.token)
+        return self.token
+
+    async def _forget_token(self, token):
+        async with self._login_lock:
+            if self.token == token:  # Not already replaced by another request
+                self.token = None
+                if self.token_cache is not None:
+                    self.token_cache.discard(self._cache_key, token)
+
+    async def _get(self, path, token_header, context, params=None, etag=None):
+        """GET an API path, logging in again once if the token is rejected.
+
+        Returns (status, headers, JSON body); the body is None when the API
+        answers 304 Not Modified to the given ETag.
+        """
+        for retry in (False, True):
+            token = await self.get_api_token()
+            headers = {token_header: token}
+            if etag:
+                headers['If-None-Match'] = etag
+            async with self.session.get(f'{self.api_url}{path}', params=params, headers=headers) as response:
+                if response.status == 401 and not retry:
+                    await self._forget_token(token)
+                    continue
+                if etag and response.status == 304:
+                    return response.status, response.headers, None
+                raise_for_status(response, context)
+                return response.status, response.headers, await response.json(content_type=None)
+
+    async def search_mosques(self, params):
+        return (await self._get('/2.0/mosque/search', 'Authorization', 'Mosque', params=params))[2]
+
+    async def fetch_prayer_times(self, uuid, etag=None):
+        """Return (calendar data, ETag); data is None when the API answers
+        304 Not Modified to the given ETag."""
+        _, headers, data = await self._get(f'/2.0/mosque/{uuid}/prayer-times', 'Api-Access-Token', 'Mosque', etag=etag)
+        return data, headers.get('ETag', etag if data is None else None)
+
+
+def raise_for_status(response, context):
+    """Raise the mawaqit library exception for an unsuccessful response."""
+    if response.status == 200:
+        return
+    if response.status == 401:
+        raise BadCredentialsException(f'Authentication failed. Response.status: {response.status}')
+    if response.status == 404:
+        raise NotFoundException(f'{context} not found. Response.status: {response.status}')
+    raise MawaqitException(f'Unexpected error. Response.status: {response.status}')
+
+
+def write_file_atomic(path, content):
+    """Write bytes to a file so that readers never see a partial file."""
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+def file_sha256(path):
+    """Return the hex SHA-256 of a file, or None if it cannot be read."""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def load_manifest(directory):
+    """Return the {uuid: {output, sha256, etag, fetched}} manifest of an
+    output directory, empty if it has none yet."""
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def save_manifest(directory, manifest):
+    content = json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8')
+    write_file_atomic(os.path.join(directory, MANIFEST_NAME), content)
+
+
+def read_uuid_list(path):
+    """Return the UUIDs of a list file: one per line, with '#' comments,
+    blank lines and repeats skipped."""
+    uuids = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            uuid = line.split('#', 1)[0].strip()
+            if uuid and uuid not in uuids:
+                uuids.append(uuid)
+    return uuids
+
+
+def positive_int(value):
+    """argparse type for a count of at least 1"""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f'must be an integer of at least 1: {value}')
+    return number
+
+
+def print_mosques(mosques, heading, distances=None):
+    print(f"Found {len(mosques)} {heading}:\n")
+    for i, m in enumerate(mosques, 1):
+        print(f"{i}. {m.get('name', 'Unknown')}")
+        print(f"   UUID: {m['uuid']}")
+        print(f"   Address: {m.get('localisation', 'N/A')}")
+        if distances:
+            print(f"   Distance: {distances[i - 1]:.2f} km")
+        print()
+
+
+def remember_mosques(index, mosques):
+    """Merge API results into the local mosque index, if one is kept."""
+    if index is not None and index.merge(mosques) != (0, 0):
+        index.save()
+
+
+async def cmd_nearby(username, password, lat, lng, api_url=API_URL, token_cache=None, index=None):
     """List nearby mosques by coordinates."""
-    client = AsyncMawaqitClient(
-        username=username, password=password,
-        latitude=lat, longitude=lng
-    )
+    api = MawaqitAPI(username, password, api_url, token_cache=token_cache)
     try:
-        await client.get_api_token()
-        mosques = await client.all_mosques_neighborhood()
-        print(f"Found {len(mosques)} nearby mosques:\n")
-        for i, m in enumerate(mosques, 1):
-            print(f"{i}. {m.get('name', 'Unknown')}")
-            print(f"   UUID: {m['uuid']}")
-            print(f"   Address: {m.get('localisation', 'N/A')}")
-            print()
+        mosques = await api.search_mosques({'lat': lat, 'lon': lng})
     finally:
-        await client.close()
+        await api.close()
+    remember_mosques(index, mosques)
+    print_mosques(mosques, 'nearby mosques')
+
+
+def cmd_nearby_offline(index, lat, lng, limit=5, radius_km=None):
+    """List the nearest mosques from the local index, without the API."""
+    if not len(index):
+        print(f"No mosques in {index.path}; run nearby, search or refresh-index online first")
+        return
+    found = index.nearest(lat, lng, limit, radius_km)
+    print_mosques([m for _, m in found], f'nearby mosques in {index.path}', [d for d, _ in found])
 
 
-async def cmd_search(username, password, keyword):
+async def cmd_search(username, password, keyword, api_url=API_URL, token_cache=None, index=None):
     """Search mosques by keyword."""
-    client = AsyncMawaqitClient(username=username, password=password)
+    api = MawaqitAPI(username, password, api_url, token_cache=token_cache)
+    try:
+        mosques = await api.search_mosques({'word': keyword, 'page': 1, 'itemsPerPage': 10})
+    finally:
+        await api.close()
+    remember_mosques(index, mosques)
+    print_mosques(mosques, f"mosques matching '{keyword}'")
+
+
+async def cmd_refresh_index(username, password, index, points, keywords, api_url=API_URL, token_cache=None):
+    """Run nearby and keyword searches and merge the results into the index."""
+    api = MawaqitAPI(username, password, api_url, token_cache=token_cache)
     try:
-        await client.get_api_token()
-        mosques = await client.fetch_mosques_by_keyword(keyword)
-        print(f"Found {len(mosques)} mosques matching '{keyword}':\n")
-        for i, m in enumerate(mosques, 1):
-            print(f"{i}. {m.get('name', 'Unknown')}")
-            print(f"   UUID: {m['uuid']}")
-            print(f"   Address: {m.get('localisation', 'N/A')}")
-            print()
+        queries = [{'lat': lat, 'lon': lng} for lat, lng in points]
+        queries += [{'word': keyword, 'page': 1, 'itemsPerPage': 50} for keyword in keywords]
+        results = await asyncio.gather(*(api.search_mosques(query) for query in queries))
     finally:
-        await client.close()
+        await api.close()
+    added = updated = 0
+    for mosques in results:
+        a, u = index.merge(mosques)
+        added, updated = added + a, updated + u
+    if added or updated:
+        index.save()
+    print(f"{index.path}: {added} added, {updated} updated, {len(index)} mosques")
+
+
+async def refresh_mosque(api, manifest, uuid, output, max_age=None):
+    """Bring the JSON file of one mosque up to date and return what was done.
+
+    'fresh' means it was fetched less than max_age seconds ago and the API
+    was not asked, 'not modified' that the API answered 304 to the stored
+    ETag, 'unchanged' that the payload hashes the same as the file, which
+    is then left alone (keeping its mtime), and 'written' that it changed.
+    """
+    entry = manifest.get(uuid)
+    if entry and (entry.get('output') != os.path.basename(output) or file_sha256(output) != entry.get('sha256')):
+        entry = None  # Moved, deleted or edited since the manifest was written
+    now = time.time()
+    if entry and max_age is not None and now - entry.get('fetched', 0) < max_age:
+        return 'fresh'
+    data, etag = await api.fetch_prayer_times(uuid, entry.get('etag') if entry else None)
+    if data is None:
+        status, digest = 'not modified', entry['sha256']
+    else:
+        text = json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+        digest = hashlib.sha256(text).hexdigest()
+        status = 'unchanged' if entry and entry['sha256'] == digest else 'written'
+        if status == 'written':
+            write_file_atomic(output, text)
+    if status == 'written' or not os.path.exists(mawaqit_sidecar_path(output)):
+        write_mawaqit_sidecar(output, data)
+    manifest[uuid] = {'output': os.path.basename(output), 'sha256': digest, 'etag': etag, 'fetched': now}
+    return status
 
 
-async def cmd_generate(username, password, uuid, output):
+async def cmd_generate(username, password, uuid, output, max_age=None, api_url=API_URL, token_cache=None):
     """Generate JSON file from mosque UUID."""
-    client = AsyncMawaqitClient(username=username, password=password)
+    directory = os.path.dirname(output) or '.'
+    manifest = load_manifest(directory)
+    api = MawaqitAPI(username, password, api_url, token_cache=token_cache)
     try:
-        await client.get_api_token()
-        client.mosque = uuid
-        data = await client.fetch_prayer_times()
-        with open(output, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        status = await refresh_mosque(api, manifest, uuid, output, max_age)
+    finally:
+        await api.close()
+    save_manifest(directory, manifest)
+    if status == 'written':
         print(f"Generated: {output}")
+    else:
+        print(f"Up to date ({status}): {output}")
+
+
+async def generate_one(api, manifest, semaphore, uuid, output_dir, max_age):
+    """Refresh one mosque; returns (uuid, output, seconds, status, error)."""
+    output = os.path.join(output_dir, f'{uuid}.json')
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            status = await refresh_mosque(api, manifest, uuid, output, max_age)
+        except (aiohttp.ClientError, asyncio.TimeoutError, MawaqitException, OSError, ValueError) as e:
+            return uuid, output, time.perf_counter() - start, 'FAILED', f'{type(e).__name__}: {e}'
+        return uuid, output, time.perf_counter() - start, status, None
+
+
+async def cmd_generate_many(username, password, uuid_file, output_dir, concurrency, max_age=None,
+                            api_url=API_URL, token_cache=None):
+    """Generate JSON files for every mosque UUID of a list file.
+
+    Returns the number of mosques that failed.
+    """
+    uuids = read_uuid_list(uuid_file)
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = load_manifest(output_dir)
+    start = time.perf_counter()
+    api = MawaqitAPI(username, password, api_url, concurrency, token_cache=token_cache)
+    try:
+        semaphore = asyncio.Semaphore(concurrency)
+        results = await asyncio.gather(*(generate_one(api, manifest, semaphore, uuid, output_dir, max_age)
+                                         for uuid in uuids))
     finally:
-        await client.close()
+        await api.close()
+        save_manifest(output_dir, manifest)
+    elapsed = time.perf_counter() - start
+
+    for uuid, output, seconds, status, error in results:
+        print(f"{status:12s} {seconds * 1000:8.1f} ms  {uuid}  {error or output}")
+    counts = {}
+    for result in results:
+        counts[result[3]] = counts.get(result[3], 0) + 1
+    failed = counts.pop('FAILED', 0)
+    latencies = sorted(result[2] for result in results if not result[4])
+    summary = f"Refreshed {len(results) - failed}/{len(results)} in {elapsed:.1f} s"
+    if counts:
+        summary += ' (' + ', '.join(f'{count} {status}' for status, count in sorted(counts.items())) + ')'
+    if latencies:
+        summary += (f", latency median {latencies[len(latencies) // 2] * 1000:.0f} ms,"
+                    f" max {latencies[-1] * 1000:.0f} ms")
+    if failed:
+        summary += f", {failed} failed"
+    print(summary)
+    return failed
 
 
 def main():
     parser = argparse.ArgumentParser(
         description='Mawaqit utility for generating prayer times JSON'
     )
-    parser.add_argument('-u', '--username', required=True, help='Mawaqit username')
-    parser.add_argument('-p', '--password', required=True, help='Mawaqit password')
+    parser.add_argument('-u', '--username', help='Mawaqit username (not needed for nearby --offline)')
+    parser.add_argument('-p', '--password', help='Mawaqit password (not needed for nearby --offline)')
+    parser.add_argument('--api-url', default=API_URL, help=f'Mawaqit API base URL (default: {API_URL})')
+    parser.add_argument('--token-cache', default=TOKEN_CACHE,
+                        help=f'File to keep the API token in between runs (default: {TOKEN_CACHE})')
+    parser.add_argument('--no-token-cache', action='store_true', help='Log in on every run')
+    parser.add_argument('--index', default=MOSQUE_INDEX,
+                        help=f'Local mosque index kept from nearby/search results (default: {MOSQUE_INDEX})')
 
     subparsers = parser.add_subparsers(dest='command', required=True)
 
@@ -70,6 +529,9 @@ def main():
     p_nearby = subparsers.add_parser('nearby', help='List nearby mosques')
     p_nearby.add_argument('--lat', type=float, required=True, help='Latitude')
     p_nearby.add_argument('--lng', type=float, required=True, help='Longitude')
+    p_nearby.add_argument('--offline', action='store_true', help='Answer from the local mosque index, without the API')
+    p_nearby.add_argument('-k', '--limit', type=positive_int, default=5, help='Mosques to list with --offline (default: 5)')
+    p_nearby.add_argument('--radius', type=float, metavar='KM', help='Only mosques within this distance, with --offline')
 
     # search command
     p_search = subparsers.add_parser('search', help='Search mosques by name')
@@ -79,15 +541,66 @@ def main():
     p_gen = subparsers.add_parser('generate', help='Generate JSON from mosque UUID')
     p_gen.add_argument('uuid', help='Mosque UUID')
     p_gen.add_argument('-o', '--output', default='mawaqit.json', help='Output file')
+    p_gen.add_argument('--max-age', type=float, metavar='HOURS',
+                       help='Skip the API if the file was fetched less than this many hours ago')
+
+    # generate-many command
+    p_many = subparsers.add_parser('generate-many', help='Generate JSON files for a list of mosque UUIDs')
+    p_many.add_argument('uuid_file', help='File with one mosque UUID per line')
+    p_many.add_argument('-d', '--output-dir', default='.', help='Directory for the <UUID>.json files')
+    p_many.add_argument('-j', '--concurrency', type=int, default=8, help='Requests in flight at once (default: 8)')
+    p_many.add_argument('--max-age', type=float, metavar='HOURS',
+                        help='Skip mosques fetched less than this many hours ago')
+
+    # refresh-index command
+    p_index = subparsers.add_parser('refresh-index', help='Add mosques around places or matching names to the local index')
+    p_index.add_argument('-a', '--around', action='append', default=[], metavar='LAT,LNG',
+                         help='Place to search around (repeatable; write --around=LAT,LNG for a negative latitude)')
+    p_index.add_argument('-k', '--keyword', action='append', default=[], help='Name to search for (repeatable)')
 
     args = parser.parse_args()
+    offline = args.command == 'nearby' and args.offline
+    if not offline and not (args.username and args.password):
+        parser.error('-u/--username and -p/--password are required')
+    max_age = getattr(args, 'max_age', None)
+    if max_age is not None:
+        max_age *= 3600
+    token_cache = None if args.no_token_cache else TokenCache(args.token_cache)
 
-    if args.command == 'nearby':
-        asyncio.run(cmd_nearby(args.username, args.password, args.lat, args.lng))
+    if offline:
+        cmd_nearby_offline(MosqueIndex(args.index), args.lat, args.lng, args.limit, args.radius)
+    elif args.command == 'nearby':
+        asyncio.run(cmd_nearby(args.username, args.password, args.lat, args.lng, args.api_url, token_cache,
+                               MosqueIndex(args.index)))
     elif args.command == 'search':
-        asyncio.run(cmd_search(args.username, args.password, args.keyword))
+        asyncio.run(cmd_search(args.username, args.password, args.keyword, args.api_url, token_cache,
+                               MosqueIndex(args.index)))
+    elif args.command == 'refresh-index':
+        points = []
+        for point in args.around:
+            try:
+                lat, lng = (float(v) for v in point.split(','))
+            except ValueError:
+                parser.error(f'Invalid place (expected LAT,LNG): {point}')
+            points.append((lat, lng))
+        if not points and not args.keyword:
+            parser.error('refresh-index needs at least one LAT,LNG or --keyword')
+        asyncio.run(cmd_refresh_index(args.username, args.password, MosqueIndex(args.index), points, args.keyword,
+                                      args.api_url, token_cache))
     elif args.command == 'generate':
-        asyncio.run(cmd_generate(args.username, args.password, args.uuid, args.output))
+        asyncio.run(cmd_generate(args.username, args.password, args.uuid, args.output, max_age,
+                                 args.api_url, token_cache))
+    elif args.command == 'generate-many':
+        if args.concurrency < 1:
+            parser.error('--concurrency must be at least 1')
+        try:
+            failed = asyncio.run(cmd_generate_many(args.username, args.password, args.uuid_file,
+                                                   args.output_dir, args.concurrency, max_age,
+                                                   args.api_url, token_cache))
+        except (aiohttp.ClientError, asyncio.TimeoutError, MawaqitException) as e:
+            print(f'Error: {type(e).__name__}: {e}')
+            sys.exit(1)
+        sys.exit(1 if failed else 0)
 
 
 if __name__ == '__main__':
@@ -3,6 +3,23 @@
 
 import math
 import re
+import datetime
+from collections import namedtuple
+
+# numpy is an optional import, only needed for the batch interface; it is
+# loaded on first use (see loadNumpy) so plain getTimes starts up quickly
+np = None
+
+def loadNumpy():
+	global np
+	if np is None:
+		try:
+			import numpy
+		except ImportError:
+			raise ImportError('numpy not available. Please install numpy'
+				' python module via pip or your package manager')
+		np = numpy
+	return np
 
 '''
 --------------------- Copyright Block ----------------------
@@ -39,6 +56,13 @@ http://praytimes.org/calculation
 ------------------------ User Interface -------------------------
 
 	getTimes (date, coordinates, timeZone [, dst [, timeFormat]])
+	getTimesRange (start, end, coordinates, timeZone [, dst])  // needs numpy
+	getTimesGrid (date, coordinateArray, timeZones [, dst])    // needs numpy
+
+	timeFormat: '24h' ('16:45'), '12h' ('4:45pm'), '12hNS' ('4:45'),
+	            'Float' (16.75), 'Minutes' (1005, minutes since midnight)
+	            or 'Time' (datetime.time(16, 45)); invalid times are
+	            '-----', or None for 'Minutes' and 'Time'
 
 	setMethod (method)       // set calculation method
 	adjust (parameters)      // adjust calculation parameters
@@ -47,6 +71,7 @@ http://praytimes.org/calculation
 	getMethod ()             // get calculation method
 	getSetting ()            // get current calculation parameters
 	getOffsets ()            // get current time offsets
+	getEphemerisStats ()     // get sun position cache hits/misses
 
 
 ------------------------- Sample Usage --------------------------
@@ -55,9 +80,84 @@ http://praytimes.org/calculation
 	>>> times = PT.getTimes((2011, 2, 9), (43, -80), -5)
 	>>> times['sunrise']
 	07:26
+	>>> PT.getTimes((2011, 2, 9), (43, -80), -5, 0, 'Minutes')['sunrise']
+	446
 
 '''
 
+#---------------------- Ephemeris Cache -------------------------
+
+# bounded table of sun positions (declination, equation of time) around
+# julian dates spaced step days apart. Each entry holds the quadratic
+# through the positions at a node and its two neighbours, and a lookup
+# evaluates the entry of the node nearest to the requested date, so the
+# key does not depend on the longitude shift in jDate and every location
+# computing the same day shares entries. With the default step of a
+# quarter day the interpolated times stay within a millisecond of the
+# direct computation, and a given julian date always gives the same
+# result whether or not its entry was cached.
+#
+# The table is a plain dict without a lock: racing threads at worst
+# compute the same entry twice, or store it in a table that was just
+# dropped, and the hit/miss counters are approximate under contention.
+# When full the whole table is dropped, as entries are cheap to recompute.
+class EphemerisCache():
+
+	def __init__(self, size = 4096, step = 0.25):
+		self.size = size
+		self.step = step
+		self.clear()
+
+	def clear(self):
+		self.table = {}
+		self.hits = 0
+		self.misses = 0
+
+	def lookup(self, jd, compute):
+		x = jd / self.step
+		n = int(round(x))
+		x -= n
+		table = self.table
+		coeffs = table.get(n)
+		if coeffs is not None:
+			self.hits += 1
+		else:
+			self.misses += 1
+			coeffs = self.interpolation(n, compute)
+			if len(table) >= self.size:
+				self.table = table = {}
+			table[n] = coeffs
+		decl, decl1, decl2, eqt, eqt1, eqt2 = coeffs
+		return (decl + x* (decl1 + x* decl2), eqt + x* (eqt1 + x* eqt2))
+
+	# return the quadratic coefficients through the sun positions at nodes
+	# n-1, n and n+1, in powers of the offset from node n
+	def interpolation(self, n, compute):
+		(d0, e0), (d1, e1), (d2, e2) = [compute(i* self.step) for i in (n- 1, n, n+ 1)]
+		# equation of time wraps by 24h when the mean longitude does
+		e0 += 24* round((e1 - e0)/ 24.0)
+		e2 += 24* round((e1 - e2)/ 24.0)
+		return (d1, (d2 - d0)/ 2.0, (d2 - 2*d1 + d0)/ 2.0,
+			e1, (e2 - e0)/ 2.0, (e2 - 2*e1 + e0)/ 2.0)
+
+	def stats(self):
+		return {'hits': self.hits, 'misses': self.misses,
+			'size': len(self.table), 'maxsize': self.size, 'step': self.step}
+
+
+#---------------------- Computation Context ---------------------
+
+# immutable state of a single getTimes call: location, julian date, time
+# zone and format, plus snapshots of the instance settings and offsets
+Context = namedtuple('Context', 'lat lng elv jDate timeZone timeFormat params offset')
+
+# calculation settings compiled into numbers: angles or minutes for each
+# time, whether that value is in minutes, the asr shadow factor and the
+# high-latitude and midnight rules
+Params = namedtuple('Params', 'imsak imsakMin fajr dhuhr asr maghrib maghribMin'
+	' isha ishaMin highLats midnight')
+
+
 #----------------------- PrayTimes Class ------------------------
 
 class PrayTimes():
@@ -126,42 +226,46 @@ class PrayTimes():
 	invalidTime =  '-----'
 
 	numIterations = 1
-	offset = {}
+
+	# sun positions shared by every instance; set to None to disable
+	ephemeris = EphemerisCache()
 
 
 	#---------------------- Initialization -----------------------
 
+	# instance settings and offsets are never changed in place: adjust and
+	# tune replace them, and each getTimes call snapshots them into its own
+	# Context, so a single instance can be shared between threads
 	def __init__(self, method = "MWL") :
 
-		# set methods defaults
-		for method, config in self.methods.items():
-			for name, value in self.defaultParams.items():
-				if not name in config['params'] or config['params'][name] is None:
-					config['params'][name] = value
-
 		# initialize settings
 		self.calcMethod = method if method in self.methods else 'MWL'
-		params = self.methods[self.calcMethod]['params']
-		for name, value in params.items():
-			self.settings[name] = value
+		settings = dict(PrayTimes.settings)
+		settings.update(self.methodParams(self.calcMethod))
+		self.settings = settings
+		self.params = self.compileParams(settings)
 
 		# init time offsets
-		for name in self.timeNames:
-			self.offset[name] = 0
+		self.offset = dict((name, 0) for name in self.timeNames)
 
 
 	#-------------------- Interface Functions --------------------
 
 	def setMethod(self, method):
 		if method in self.methods:
-			self.adjust(self.methods[method]['params'])
+			self.adjust(self.methodParams(method))
 			self.calcMethod = method
 
 	def adjust(self, params):
-		self.settings.update(params)
+		settings = dict(self.settings)
+		settings.update(params)
+		self.settings = settings
+		self.params = self.compileParams(settings)
 
 	def tune(self, timeOffsets):
-		self.offsets.update(timeOffsets)
+		offset = dict(self.offset)
+		offset.update(timeOffsets)
+		self.offset = offset
 
 	def getMethod(self):
 		return self.calcMethod
@@ -173,25 +277,63 @@ class PrayTimes():
 		return self.offset
 
 	def getDefaults(self):
-		return self.methods
+		return dict((method, {'name': config['name'], 'params': self.methodParams(method)})
+			for method, config in self.methods.items())
+
+	def getEphemerisStats(self):
+		return self.ephemeris.stats() if self.ephemeris else None
 
 	# return prayer times for a given date
 	def getTimes(self, date, coords, timezone, dst = 0, format = None):
-		self.lat = coords[0]
-		self.lng = coords[1]
-		self.elv = coords[2] if len(coords)>2 else 0
-		if format != None:
-			self.timeFormat = format
+		lng = coords[1]
 		if type(date).__name__ == 'date':
 			date = (date.year, date.month, date.day)
-		self.timeZone = timezone + (1 if dst else 0)
-		self.jDate = self.julian(date[0], date[1], date[2]) - self.lng / (15 * 24.0)
-		return self.computeTimes()
-
-	# convert float time to the given format (see timeFormats)
+		jDate = self.julian(date[0], date[1], date[2]) - lng / (15 * 24.0)
+		ctx = self.context(coords[0], lng, coords[2] if len(coords)>2 else 0,
+			jDate, timezone + (1 if dst else 0), format)
+		return self.computeTimes(ctx)
+
+	# snapshot the current settings into a computation context
+	def context(self, lat, lng, elv, jDate, timeZone, format = None):
+		return Context(lat, lng, elv, jDate, timeZone,
+			format if format != None else self.timeFormat, self.params, self.offset)
+
+	# return float prayer times for every day from start to end (inclusive),
+	# as numpy arrays keyed by time name; dst may also be a per-day array
+	def getTimesRange(self, start, end, coords, timezone, dst = 0):
+		loadNumpy()
+		start = self.toDate(start)
+		end = self.toDate(end)
+		days = (end - start).days + 1
+		if days < 1:
+			raise ValueError('End date %s is before start date %s' % (end, start))
+		lat = coords[0]
+		lng = coords[1]
+		elv = coords[2] if len(coords)>2 else 0
+		timeZone = timezone + (np.asarray(dst) != 0)
+		jDate = self.julian(start.year, start.month, start.day) + np.arange(days) - lng / (15 * 24.0)
+		return self.computeTimesArray(self.context(lat, lng, elv, jDate, timeZone, 'Float'))
+
+	# return float prayer times for many locations on a given date, as numpy
+	# arrays keyed by time name; coords is an array whose last axis holds
+	# (lat, lng [, elv]), and timezone/dst are broadcast against the rest
+	def getTimesGrid(self, date, coords, timezone, dst = 0):
+		loadNumpy()
+		date = self.toDate(date)
+		coords = np.asarray(coords, dtype=float)
+		if coords.ndim < 1 or coords.shape[-1] not in (2, 3):
+			raise ValueError('Coordinates must end in an axis of (lat, lng [, elv])')
+		lat = coords[..., 0]
+		lng = coords[..., 1]
+		elv = coords[..., 2] if coords.shape[-1] > 2 else 0
+		timeZone = np.asarray(timezone, dtype=float) + (np.asarray(dst) != 0)
+		jDate = self.julian(date.year, date.month, date.day) - lng / (15 * 24.0)
+		return self.computeTimesArray(self.context(lat, lng, elv, jDate, timeZone, 'Float'))
+
+	# convert float time to the given format (see timeFormat)
 	def getFormattedTime(self, time, format, suffixes = None):
 		if math.isnan(time):
-			return self.invalidTime
+			return None if format in ('Minutes', 'Time') else self.invalidTime
 		if format == 'Float':
 			return time
 		if suffixes == None:
@@ -201,6 +343,10 @@ class PrayTimes():
 		hours = math.floor(time)
 
 		minutes = math.floor((time- hours)* 60)
+		if format == 'Minutes':
+			return hours % 24* 60+ minutes
+		if format == 'Time':
+			return datetime.time(hours % 24, minutes)
 		suffix = suffixes[ 0 if hours < 12 else 1 ] if format == '12h' else ''
 		formattedTime = "%02d:%02d" % (hours, minutes) if format == "24h" else "%d:%02d" % ((hours+11)%12+1, minutes)
 		return formattedTime + suffix
@@ -209,30 +355,37 @@ class PrayTimes():
 	#---------------------- Calculation Functions -----------------------
 
 	# compute mid-day time
-	def midDay(self, time):
-		eqt = self.sunPosition(self.jDate + time)[1]
+	def midDay(self, ctx, time):
+		eqt = self.sunPosition(ctx.jDate + time)[1]
 		return self.fixhour(12 - eqt)
 
 	# compute the time at which sun reaches a specific angle below horizon
-	def sunAngleTime(self, angle, time, direction = None):
+	def sunAngleTime(self, ctx, angle, time, direction = None):
 		try:
-			decl = self.sunPosition(self.jDate + time)[0]
-			noon = self.midDay(time)
-			t = 1/15.0* self.arccos((-self.sin(angle)- self.sin(decl)* self.sin(self.lat))/
-					(self.cos(decl)* self.cos(self.lat)))
+			decl = self.sunPosition(ctx.jDate + time)[0]
+			noon = self.midDay(ctx, time)
+			t = 1/15.0* self.arccos((-self.sin(angle)- self.sin(decl)* self.sin(ctx.lat))/
+					(self.cos(decl)* self.cos(ctx.lat)))
 			return noon+ (-t if direction == 'ccw' else t)
 		except ValueError:
 			return float('nan')
 
 	# compute asr time
-	def asrTime(self, factor, time):
-		decl = self.sunPosition(self.jDate + time)[0]
-		angle = -self.arccot(factor + self.tan(abs(self.lat - decl)))
-		return self.sunAngleTime(angle, time)
+	def asrTime(self, ctx, factor, time):
+		decl = self.sunPosition(ctx.jDate + time)[0]
+		angle = -self.arccot(factor + self.tan(abs(ctx.lat - decl)))
+		return self.sunAngleTime(ctx, angle, time)
+
+	# return declination angle of sun and equation of time, from the
+	# ephemeris cache when enabled
+	def sunPosition(self, jd):
+		if self.ephemeris is None:
+			return self.computeSunPosition(jd)
+		return self.ephemeris.lookup(jd, self.computeSunPosition)
 
 	# compute declination angle of sun and equation of time
 	# Ref: http://aa.usno.navy.mil/faq/docs/SunApprox.php
-	def sunPosition(self, jd):
+	def computeSunPosition(self, jd):
 		D = jd - 2451545.0
 		g = self.fixangle(357.529 + 0.98560028* D)
 		q = self.fixangle(280.459 + 0.98564736* D)
@@ -262,61 +415,62 @@ class PrayTimes():
 	#---------------------- Compute Prayer Times -----------------------
 
 	# compute prayer times at given julian date
-	def computePrayerTimes(self, times):
+	def computePrayerTimes(self, ctx, times):
 		times = self.dayPortion(times)
-		params = self.settings
-
-		imsak   = self.sunAngleTime(self.eval(params['imsak']), times['imsak'], 'ccw')
-		fajr    = self.sunAngleTime(self.eval(params['fajr']), times['fajr'], 'ccw')
-		sunrise = self.sunAngleTime(self.riseSetAngle(self.elv), times['sunrise'], 'ccw')
-		dhuhr   = self.midDay(times['dhuhr'])
-		asr     = self.asrTime(self.asrFactor(params['asr']), times['asr'])
-		sunset  = self.sunAngleTime(self.riseSetAngle(self.elv), times['sunset'])
-		maghrib = self.sunAngleTime(self.eval(params['maghrib']), times['maghrib'])
-		isha    = self.sunAngleTime(self.eval(params['isha']), times['isha'])
+		params = ctx.params
+		riseSet = self.riseSetAngle(ctx.elv)
+
+		imsak   = self.sunAngleTime(ctx, params.imsak, times['imsak'], 'ccw')
+		fajr    = self.sunAngleTime(ctx, params.fajr, times['fajr'], 'ccw')
+		sunrise = self.sunAngleTime(ctx, riseSet, times['sunrise'], 'ccw')
+		dhuhr   = self.midDay(ctx, times['dhuhr'])
+		asr     = self.asrTime(ctx, params.asr, times['asr'])
+		sunset  = self.sunAngleTime(ctx, riseSet, times['sunset'])
+		maghrib = self.sunAngleTime(ctx, params.maghrib, times['maghrib'])
+		isha    = self.sunAngleTime(ctx, params.isha, times['isha'])
 		return {
 			'imsak': imsak, 'fajr': fajr, 'sunrise': sunrise, 'dhuhr': dhuhr,
 			'asr': asr, 'sunset': sunset, 'maghrib': maghrib, 'isha': isha
 		}
 
 	# compute prayer times
-	def computeTimes(self):
+	def computeTimes(self, ctx):
 		times = {
 			'imsak': 5, 'fajr': 5, 'sunrise': 6, 'dhuhr': 12,
 			'asr': 13, 'sunset': 18, 'maghrib': 18, 'isha': 18
 		}
 		# main iterations
 		for i in range(self.numIterations):
-			times = self.computePrayerTimes(times)
-		times = self.adjustTimes(times)
+			times = self.computePrayerTimes(ctx, times)
+		times = self.adjustTimes(ctx, times)
 		# add midnight time
-		if self.settings['midnight'] == 'Jafari':
+		if ctx.params.midnight == 'Jafari':
 			times['midnight'] = times['sunset'] + self.timeDiff(times['sunset'], times['fajr']) / 2
 		else:
 			times['midnight'] = times['sunset'] + self.timeDiff(times['sunset'], times['sunrise']) / 2
 
-		times = self.tuneTimes(times)
-		return self.modifyFormats(times)
+		times = self.tuneTimes(ctx, times)
+		return self.modifyFormats(ctx, times)
 
 	# adjust times in a prayer time array
-	def adjustTimes(self, times):
-		params = self.settings
-		tzAdjust = self.timeZone - self.lng / 15.0
+	def adjustTimes(self, ctx, times):
+		params = ctx.params
+		tzAdjust = ctx.timeZone - ctx.lng / 15.0
 		for t,v in times.items():
 			times[t] += tzAdjust
 
-		if params['highLats'] != 'None':
-			times = self.adjustHighLats(times)
+		if params.highLats != 'None':
+			times = self.adjustHighLats(ctx, times)
 
-		if self.isMin(params['imsak']):
-			times['imsak'] = times['fajr'] - self.eval(params['imsak']) / 60.0
+		if params.imsakMin:
+			times['imsak'] = times['fajr'] - params.imsak / 60.0
 		# need to ask about 'min' settings
-		if self.isMin(params['maghrib']):
-			times['maghrib'] = times['sunset'] - self.eval(params['maghrib']) / 60.0
+		if params.maghribMin:
+			times['maghrib'] = times['sunset'] - params.maghrib / 60.0
 
-		if self.isMin(params['isha']):
-			times['isha'] = times['maghrib'] + self.eval(params['isha']) / 60.0
-		times['dhuhr'] += self.eval(params['dhuhr']) / 60.0
+		if params.ishaMin:
+			times['isha'] = times['maghrib'] + params.isha / 60.0
+		times['dhuhr'] += params.dhuhr / 60.0
 
 		return times
 
@@ -331,38 +485,38 @@ class PrayTimes():
 		return 0.833 + 0.0347 * math.sqrt(elevation) # an approximation
 
 	# apply offsets to the times
-	def tuneTimes(self, times):
+	def tuneTimes(self, ctx, times):
 		for name, value in times.items():
-			times[name] += self.offset[name] / 60.0
+			times[name] = value + ctx.offset[name] / 60.0
 		return times
 
 	# convert times to given time format
-	def modifyFormats(self, times):
+	def modifyFormats(self, ctx, times):
 		for name, value in times.items():
-			times[name] = self.getFormattedTime(times[name], self.timeFormat)
+			times[name] = self.getFormattedTime(times[name], ctx.timeFormat)
 		return times
 
 	# adjust times for locations in higher latitudes
-	def adjustHighLats(self, times):
-		params = self.settings
+	def adjustHighLats(self, ctx, times):
+		params = ctx.params
 		nightTime = self.timeDiff(times['sunset'], times['sunrise']) # sunset to sunrise
-		times['imsak'] = self.adjustHLTime(times['imsak'], times['sunrise'], self.eval(params['imsak']), nightTime, 'ccw')
-		times['fajr']  = self.adjustHLTime(times['fajr'], times['sunrise'], self.eval(params['fajr']), nightTime, 'ccw')
-		times['isha']  = self.adjustHLTime(times['isha'], times['sunset'], self.eval(params['isha']), nightTime)
-		times['maghrib'] = self.adjustHLTime(times['maghrib'], times['sunset'], self.eval(params['maghrib']), nightTime)
+		times['imsak'] = self.adjustHLTime(ctx, times['imsak'], times['sunrise'], params.imsak, nightTime, 'ccw')
+		times['fajr']  = self.adjustHLTime(ctx, times['fajr'], times['sunrise'], params.fajr, nightTime, 'ccw')
+		times['isha']  = self.adjustHLTime(ctx, times['isha'], times['sunset'], params.isha, nightTime)
+		times['maghrib'] = self.adjustHLTime(ctx, times['maghrib'], times['sunset'], params.maghrib, nightTime)
 		return times
 
 	# adjust a time for higher latitudes
-	def adjustHLTime(self, time, base, angle, night, direction = None):
-		portion = self.nightPortion(angle, night)
+	def adjustHLTime(self, ctx, time, base, angle, night, direction = None):
+		portion = self.nightPortion(ctx, angle, night)
 		diff = self.timeDiff(time, base) if direction == 'ccw' else self.timeDiff(base, time)
 		if math.isnan(time) or diff > portion:
 			time = base + (-portion if direction == 'ccw' else portion)
 		return time
 
 	# the night portion used for adjusting times in higher latitudes
-	def nightPortion(self, angle, night):
-		method = self.settings['highLats']
+	def nightPortion(self, ctx, angle, night):
+		method = ctx.params.highLats
 		portion = 1/2.0  # midnight
 		if method == 'AngleBased':
 			portion = 1/60.0 * angle
@@ -377,8 +531,155 @@ class PrayTimes():
 		return times
 
 
+	#---------------------- Batch Functions -----------------------
+	# numpy versions of the calculation functions above; every argument may
+	# be a scalar or an array, and results are broadcast across all of them
+
+	# compute prayer times for a context holding arrays of julian dates
+	# and/or locations
+	def computeTimesArray(self, ctx):
+		times = {
+			'imsak': 5, 'fajr': 5, 'sunrise': 6, 'dhuhr': 12,
+			'asr': 13, 'sunset': 18, 'maghrib': 18, 'isha': 18
+		}
+		for i in range(self.numIterations):
+			times = self.computePrayerTimesArray(ctx, times)
+		times = self.adjustTimesArray(ctx, times)
+		if ctx.params.midnight == 'Jafari':
+			times['midnight'] = times['sunset'] + self.timeDiffArray(times['sunset'], times['fajr']) / 2
+		else:
+			times['midnight'] = times['sunset'] + self.timeDiffArray(times['sunset'], times['sunrise']) / 2
+		return self.tuneTimes(ctx, times)
+
+	# compute prayer times for arrays of julian dates
+	def computePrayerTimesArray(self, ctx, times):
+		times = self.dayPortion(times)
+		params = ctx.params
+		riseSet = 0.833 + 0.0347 * np.sqrt(ctx.elv)
+
+		with np.errstate(invalid='ignore'):
+			imsak   = self.sunAngleTimeArray(ctx, params.imsak, times['imsak'], 'ccw')
+			fajr    = self.sunAngleTimeArray(ctx, params.fajr, times['fajr'], 'ccw')
+			sunrise = self.sunAngleTimeArray(ctx, riseSet, times['sunrise'], 'ccw')
+			dhuhr   = self.midDayArray(ctx, times['dhuhr'])
+			asr     = self.asrTimeArray(ctx, params.asr, times['asr'])
+			sunset  = self.sunAngleTimeArray(ctx, riseSet, times['sunset'])
+			maghrib = self.sunAngleTimeArray(ctx, params.maghrib, times['maghrib'])
+			isha    = self.sunAngleTimeArray(ctx, params.isha, times['isha'])
+		return {
+			'imsak': imsak, 'fajr': fajr, 'sunrise': sunrise, 'dhuhr': dhuhr,
+			'asr': asr, 'sunset': sunset, 'maghrib': maghrib, 'isha': isha
+		}
+
+	# compute mid-day times
+	def midDayArray(self, ctx, time):
+		eqt = self.sunPositionArray(ctx.jDate + time)[1]
+		return self.fixArray(12 - eqt, 24.0)
+
+	# compute the times at which sun reaches a specific angle below horizon;
+	# undefined times (sun never reaches the angle) come out as nan
+	def sunAngleTimeArray(self, ctx, angle, time, direction = None):
+		decl, eqt = self.sunPositionArray(ctx.jDate + time)
+		noon = self.fixArray(12 - eqt, 24.0)
+		t = 1/15.0* np.degrees(np.arccos((-np.sin(np.radians(angle))- np.sin(np.radians(decl))* np.sin(np.radians(ctx.lat)))/
+				(np.cos(np.radians(decl))* np.cos(np.radians(ctx.lat)))))
+		return noon+ (-t if direction == 'ccw' else t)
+
+	# compute asr times
+	def asrTimeArray(self, ctx, factor, time):
+		decl = self.sunPositionArray(ctx.jDate + time)[0]
+		angle = -np.degrees(np.arctan(1.0/ (factor + np.tan(np.radians(np.abs(ctx.lat - decl))))))
+		return self.sunAngleTimeArray(ctx, angle, time)
+
+	# compute declination angle of sun and equation of time for julian dates
+	def sunPositionArray(self, jd):
+		D = jd - 2451545.0
+		g = self.fixArray(357.529 + 0.98560028* D, 360.0)
+		q = self.fixArray(280.459 + 0.98564736* D, 360.0)
+		L = self.fixArray(q + 1.915* np.sin(np.radians(g)) + 0.020* np.sin(np.radians(2*g)), 360.0)
+
+		e = np.radians(23.439 - 0.00000036* D)
+		L = np.radians(L)
+
+		RA = np.degrees(np.arctan2(np.cos(e)* np.sin(L), np.cos(L)))/ 15.0
+		eqt = q/15.0 - self.fixArray(RA, 24.0)
+		decl = np.degrees(np.arcsin(np.sin(e)* np.sin(L)))
+
+		return (decl, eqt)
+
+	# adjust arrays of prayer times
+	def adjustTimesArray(self, ctx, times):
+		params = ctx.params
+		tzAdjust = ctx.timeZone - ctx.lng / 15.0
+		for t,v in times.items():
+			times[t] = v + tzAdjust
+
+		if params.highLats != 'None':
+			times = self.adjustHighLatsArray(ctx, times)
+
+		if params.imsakMin:
+			times['imsak'] = times['fajr'] - params.imsak / 60.0
+		if params.maghribMin:
+			times['maghrib'] = times['sunset'] - params.maghrib / 60.0
+		if params.ishaMin:
+			times['isha'] = times['maghrib'] + params.isha / 60.0
+		times['dhuhr'] = times['dhuhr'] + params.dhuhr / 60.0
+
+		return times
+
+	# adjust arrays of times for locations in higher latitudes
+	def adjustHighLatsArray(self, ctx, times):
+		params = ctx.params
+		nightTime = self.timeDiffArray(times['sunset'], times['sunrise'])
+		times['imsak'] = self.adjustHLTimeArray(ctx, times['imsak'], times['sunrise'], params.imsak, nightTime, 'ccw')
+		times['fajr']  = self.adjustHLTimeArray(ctx, times['fajr'], times['sunrise'], params.fajr, nightTime, 'ccw')
+		times['isha']  = self.adjustHLTimeArray(ctx, times['isha'], times['sunset'], params.isha, nightTime)
+		times['maghrib'] = self.adjustHLTimeArray(ctx, times['maghrib'], times['sunset'], params.maghrib, nightTime)
+		return times
+
+	# adjust an array of times for higher latitudes
+	def adjustHLTimeArray(self, ctx, time, base, angle, night, direction = None):
+		portion = self.nightPortion(ctx, angle, night)
+		diff = self.timeDiffArray(time, base) if direction == 'ccw' else self.timeDiffArray(base, time)
+		with np.errstate(invalid='ignore'):
+			adjust = np.isnan(time) | (diff > portion)
+		return np.where(adjust, base + (-portion if direction == 'ccw' else portion), time)
+
+	def timeDiffArray(self, time1, time2):
+		return self.fixArray(time2- time1, 24.0)
+
+	def fixArray(self, a, mode):
+		a = a - mode * np.floor(a / mode)
+		with np.errstate(invalid='ignore'):
+			return np.where(a < 0, a + mode, a)
+
+
 	#---------------------- Misc Functions -----------------------
 
+	# compile settings into the numeric Params used by the calculations
+	def compileParams(self, settings):
+		return Params(
+			imsak = self.eval(settings['imsak']), imsakMin = self.isMin(settings['imsak']),
+			fajr = self.eval(settings['fajr']), dhuhr = self.eval(settings['dhuhr']),
+			asr = self.asrFactor(settings['asr']),
+			maghrib = self.eval(settings['maghrib']), maghribMin = self.isMin(settings['maghrib']),
+			isha = self.eval(settings['isha']), ishaMin = self.isMin(settings['isha']),
+			highLats = settings['highLats'], midnight = settings['midnight'])
+
+	# return the parameters of a calculation method, with defaults filled in
+	def methodParams(self, method):
+		params = dict(self.defaultParams)
+		for name, value in self.methods[method]['params'].items():
+			if value is not None:
+				params[name] = value
+		return params
+
+	# convert a date object or a (year, month, day) tuple to a date
+	def toDate(self, date):
+		if isinstance(date, datetime.date):
+			return datetime.date(date.year, date.month, date.day)
+		return datetime.date(date[0], date[1], date[2])
+
 	# compute the difference between two times
 	def timeDiff(self, time1, time2):
 		return self.fixhour(time2- time1)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test the yearly timetables of generateTimetables.py.
+"""
+
+import contextlib
+import csv
+import datetime
+import io
+import json
+import shutil
+import sys
+import tempfile
+import unittest
+from os.path import dirname, abspath, join as pathjoin
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+import generateTimetables as timetables
+from praytimes import PrayTimes
+
+CAIRO = {'name': 'Cairo', 'lat': 30.04, 'lng': 31.24, 'timezone': 2}
+LONDON = {'name': 'London', 'lat': 51.5, 'lng': -0.13, 'timezone': 'Europe/London'}
+
+
+class TimetablesTestCase(unittest.TestCase):
+    """Test location checks, yearly rows and output formats"""
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix='adhan-test-')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def locations_file(self, locations):
+        path = pathjoin(self.tmp, 'locations.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(locations, f)
+        return path
+
+    def test_01_load_locations(self):
+        """Valid locations load, with a default name"""
+        locations = timetables.load_locations(self.locations_file(
+            [CAIRO, LONDON, {'lat': -90, 'lng': 180, 'timezone': -14}]))
+        self.assertEqual([loc['name'] for loc in locations], ['Cairo', 'London', '-90,180'])
+
+    def test_02_invalid_locations(self):
+        """Bad coordinates and time zones are refused up front"""
+        for bad, message in [({'key': 'value'}, 'must contain a JSON list'),
+                             ([{'lat': 1, 'timezone': 0}], 'needs at least "lat" and "lng"'),
+                             ([dict(CAIRO, lat=90.5)], 'invalid "lat"'),
+                             ([dict(CAIRO, lng=-181)], 'invalid "lng"'),
+                             ([dict(CAIRO, lng='31')], 'invalid "lng"'),
+                             ([dict(CAIRO, lat=True)], 'invalid "lat"'),
+                             ([{'lat': 1, 'lng': 2}], 'needs a "timezone"'),
+                             ([dict(CAIRO, timezone=15)], 'UTC offset must be -14 to 14'),
+                             ([CAIRO, dict(LONDON, timezone='Europe/Londn')], 'Location #2 has an unknown')]:
+            with self.assertRaises(ValueError) as err:
+                timetables.load_locations(self.locations_file(bad))
+            self.assertIn(message, str(err.exception))
+
+    def test_03_compute_year(self):
+        """Every day of the year, with the zone's summer time offset"""
+        rows = timetables.compute_year(dict(LONDON, elv=0), 'ISNA', 2024)
+        self.assertEqual(len(rows), 366)
+        self.assertEqual([row['date'] for row in rows[58:61]], ['2024-02-28', '2024-02-29', '2024-03-01'])
+        self.assertEqual(set(rows[0]), set(['location', 'method', 'date'] + timetables.TIME_NAMES))
+        prayers = PrayTimes('ISNA')
+        coords = (LONDON['lat'], LONDON['lng'], 0)
+        self.assertEqual(rows[0]['dhuhr'], prayers.getTimes(datetime.date(2024, 1, 1), coords, 0)['dhuhr'])
+        self.assertEqual(rows[182]['dhuhr'], prayers.getTimes(datetime.date(2024, 7, 1), coords, 1)['dhuhr'])
+        minutes = timetables.compute_year(CAIRO, 'MWL', 2023, 'Minutes')
+        self.assertEqual(len(minutes), 365)
+        self.assertIsInstance(minutes[0]['fajr'], int)
+
+    def run_main(self, *args):
+        err = io.StringIO()
+        with contextlib.redirect_stderr(err):
+            timetables.main([self.locations_file([CAIRO, LONDON]), '--year', '2024', '-j', '2'] + list(args))
+        return err.getvalue()
+
+    def test_04_formats(self):
+        """The output format follows the file extension"""
+        self.run_main('-o', pathjoin(self.tmp, 'out.json'))
+        with open(pathjoin(self.tmp, 'out.json'), encoding='utf-8') as f:
+            rows = json.load(f)
+        self.assertEqual(len(rows), 2 * 366)
+        self.run_main('-o', pathjoin(self.tmp, 'out.jsonl'), '--method', 'ISNA', '--method', 'MWL')
+        with open(pathjoin(self.tmp, 'out.jsonl'), encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(len(rows), 4 * 366)
+        self.run_main('-o', pathjoin(self.tmp, 'out.txt'))
+        with open(pathjoin(self.tmp, 'out.txt'), encoding='utf-8', newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), 2 * 366)
+        self.assertEqual(set(row['location'] for row in rows), set(['Cairo', 'London']))
+
+    def test_05_errors(self):
+        """Bad locations and methods exit before computing anything"""
+        with self.assertRaises(SystemExit) as exit:
+            self.run_main('--method', 'Nope', '-o', pathjoin(self.tmp, 'out.csv'))
+        self.assertEqual(exit.exception.code, 1)
+        with self.assertRaises(SystemExit) as exit:
+            with contextlib.redirect_stderr(io.StringIO()):
+                timetables.main([self.locations_file([dict(CAIRO, lat=100)])])
+        self.assertEqual(exit.exception.code, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Test mawaqit_util.py against a local stub of the Mawaqit API.
+"""
+
+import asyncio
+import calendar
+import os
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from os.path import dirname, abspath, join as pathjoin
+
+root_dir = dirname(dirname(abspath(__file__)))
+sys.path.insert(0, root_dir)
+
+try:
+    from aiohttp import web
+    import mawaqit_util
+except ImportError:
+    mawaqit_util = None
+
+CALENDAR = [{str(day): ['05:%02d' % (day % 60), '07:00', '12:00', '15:00', '18:00', '20:00']
+             for day in range(1, calendar.monthrange(2024, month)[1] + 1)}
+            for month in range(1, 13)]
+
+
+def statuses(output):
+    """Map each UUID of a generate-many report to its status"""
+    return dict((uuid, status) for status, uuid in
+                re.findall(r'^(\S+(?: \S+)?) +[\d.]+ ms  (\S+)  ', output, re.M))
+
+
+class StubServer:
+    """The login and prayer-times endpoints of the Mawaqit API, served from
+    a thread on a free local port. UUIDs starting with 'missing' are not
+    found. The counters in state are only read once requests are done."""
+
+    def __init__(self):
+        self.state = {'logins': 0, 'fetches': 0, 'inflight': 0, 'max_inflight': 0,
+                      'token': None, 'etag': '"v1"'}
+
+    async def login(self, request):
+        self.state['logins'] += 1
+        if request.headers.get('Authorization') != 'Basic dTpw':  # u:p
+            return web.Response(status=401)
+        self.state['token'] = 'tok%d' % self.state['logins']
+        return web.json_response({'apiAccessToken': self.state['token']})
+
+    async def prayer_times(self, request):
+        state = self.state
+        state['fetches'] += 1
+        if request.headers.get('Api-Access-Token') != state['token']:
+            return web.Response(status=401)
+        state['inflight'] += 1
+        state['max_inflight'] = max(state['max_inflight'], state['inflight'])
+        try:
+            await asyncio.sleep(0.02)
+        finally:
+            state['inflight'] -= 1
+        uuid = request.match_info['uuid']
+        if uuid.startswith('missing'):
+            return web.Response(status=404)
+        headers = {'ETag': state['etag']} if state['etag'] else {}
+        if state['etag'] and request.headers.get('If-None-Match') == state['etag']:
+            return web.Response(status=304, headers=headers)
+        return web.json_response({'uuid': uuid, 'calendar': CALENDAR}, headers=headers)
+
+    def start(self):
+        app = web.Application()
+        app.router.add_post('/api/2.0/me', self.login)
+        app.router.add_get('/api/2.0/mosque/{uuid}/prayer-times', self.prayer_times)
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        self.url = 'http://127.0.0.1:%d/api' % sock.getsockname()[1]
+        self.loop = asyncio.new_event_loop()
+        self.runner = web.AppRunner(app)
+        self.loop.run_until_complete(self.runner.setup())
+        self.loop.run_until_complete(web.SockSite(self.runner, sock).start())
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.run_until_complete(self.runner.cleanup())
+        self.loop.close()
+
+
+@unittest.skipIf(mawaqit_util is None, 'aiohttp or mawaqit not installed')
+class GenerateManyTestCase(unittest.TestCase):
+    """Test the generate-many command"""
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix='adhan-test-')
+        self.out = pathjoin(self.tmp, 'out')
+        self.token_file = pathjoin(self.tmp, 'cache', 'token.json')
+        self.stub = StubServer()
+        self.stub.start()
+
+    def tearDown(self):
+        self.stub.stop()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def uuid_file(self, *uuids):
+        path = pathjoin(self.tmp, 'uuids.txt')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(uuids) + '\n')
+        return path
+
+    def run_cli(self, *args):
+        env = dict(os.environ, XDG_CACHE_HOME=pathjoin(self.tmp, 'xdg'))
+        cmd = [sys.executable, pathjoin(root_dir, 'mawaqit_util.py'), '-u', 'u', '-p', 'p',
+               '--api-url', self.stub.url, '--token-cache', self.token_file] + list(args)
+        return subprocess.run(cmd, env=env, cwd=self.tmp, stdout=subprocess.PIPE,
+                              stderr=subprocess.STDOUT, universal_newlines=True, timeout=60)
+
+    def test_01_one_login_and_failure(self):
+        """All mosques share one login, and a 404 fails only its mosque"""
+        uuids = ['m%d' % i for i in range(8)] + ['missing-1']
+        result = self.run_cli('generate-many', self.uuid_file(*uuids), '-d', self.out, '-j', '4')
+        self.assertEqual(result.returncode, 1, result.stdout)
+        self.assertEqual(self.stub.state['logins'], 1)
+        self.assertLessEqual(self.stub.state['max_inflight'], 4)
+        expected = dict((uuid, 'written') for uuid in uuids[:-1])
+        expected['missing-1'] = 'FAILED'
+        self.assertEqual(statuses(result.stdout), expected)
+        self.assertIn('NotFoundException', result.stdout)
+        self.assertIn('1 failed', result.stdout)
+        for uuid in uuids[:-1]:
+            self.assertTrue(os.path.exists(pathjoin(self.out, uuid + '.json')))
+            self.assertTrue(os.path.exists(pathjoin(self.out, uuid + '.json.bin')))
+        self.assertFalse(os.path.exists(pathjoin(self.out, 'missing-1.json')))
+
+    def test_02_success(self):
+        """The command exits 0 when every mosque was refreshed"""
+        result = self.run_cli('generate-many', self.uuid_file('m1', 'm2'), '-d', self.out)
+        self.assertEqual(result.returncode, 0, result.stdout)
+        self.assertEqual(statuses(result.stdout), {'m1': 'written', 'm2': 'written'})
+
+    def refresh_twice(self, *args):
+        """Run generate-many twice over the same mosques and return the
+        statuses of the second run; the files must not be rewritten"""
+        uuids = self.uuid_file('m1', 'm2')
+        self.assertEqual(self.run_cli('generate-many', uuids, '-d', self.out).returncode, 0)
+        paths = [pathjoin(self.out, name) for name in ('m1.json', 'm1.json.bin', 'm2.json')]
+        mtimes = [os.stat(path).st_mtime_ns for path in paths]
+        result = self.run_cli('generate-many', uuids, '-d', self.out, *args)
+        self.assertEqual(result.returncode, 0, result.stdout)
+        self.assertEqual([os.stat(path).st_mtime_ns for path in paths], mtimes)
+        return statuses(result.stdout)
+
+    def test_03_not_modified(self):
+        """A 304 to the stored ETag leaves the files alone"""
+        self.assertEqual(self.refresh_twice(), {'m1': 'not modified', 'm2': 'not modified'})
+        self.assertEqual(self.stub.state['fetches'], 4)
+
+    def test_04_unchanged(self):
+        """A payload that hashes like the file leaves it alone"""
+        self.stub.state['etag'] = None
+        self.assertEqual(self.refresh_twice(), {'m1': 'unchanged', 'm2': 'unchanged'})
+        self.assertEqual(self.stub.state['fetches'], 4)
+
+    def test_05_fresh(self):
+        """Mosques fetched within --max-age are not requested again"""
+        self.assertEqual(self.refresh_twice('--max-age', '1'), {'m1': 'fresh', 'm2': 'fresh'})
+        self.assertEqual(self.stub.state['fetches'], 2)
+
+    def test_06_edited(self):
+        """A file edited since it was generated is written again"""
+        uuids = self.uuid_file('m1')
+        self.run_cli('generate-many', uuids, '-d', self.out)
+        with open(pathjoin(self.out, 'm1.json'), 'a', encoding='utf-8') as f:
+            f.write('\n')
+        result = self.run_cli('generate-many', uuids, '-d', self.out, '--max-age', '1')
+        self.assertEqual(statuses(result.stdout), {'m1': 'written'})
+
+
+    def test_07_token_cache(self):
+        """The token is kept in a private file and reused by the next run"""
+        uuids = self.uuid_file('m1')
+        self.run_cli('generate-many', uuids, '-d', self.out)
+        self.assertEqual(os.stat(self.token_file).st_mode & 0o777, 0o600)
+        self.assertEqual(os.stat(dirname(self.token_file)).st_mode & 0o777, 0o700)
+        result = self.run_cli('generate-many', uuids, '-d', self.out)
+        self.assertEqual(result.returncode, 0, result.stdout)
+        self.assertEqual(self.stub.state['logins'], 1)
+
+    def test_08_token_cache_permissions(self):
+        """A token file that others can read is ignored"""
+        uuids = self.uuid_file('m1')
+        self.run_cli('generate-many', uuids, '-d', self.out)
+        os.chmod(self.token_file, 0o644)
+        self.run_cli('generate-many', uuids, '-d', self.out)
+        self.assertEqual(self.stub.state['logins'], 2)
+        self.assertEqual(os.stat(self.token_file).st_mode & 0o777, 0o600)
+
+    def test_09_relogin(self):
+        """A revoked token makes concurrent requests log in again once"""
+        uuids = ['m%d' % i for i in range(8)]
+        self.run_cli('generate-many', self.uuid_file('m0'), '-d', self.out)
+        self.stub.state['token'] = 'revoked'
+        result = self.run_cli('generate-many', self.uuid_file(*uuids), '-d', self.out, '-j', '8')
+        self.assertEqual(result.returncode, 0, result.stdout)
+        self.assertEqual(self.stub.state['logins'], 2)
+        self.assertGreater(self.stub.state['max_inflight'], 1)
+        self.assertEqual(set(statuses(result.stdout)), set(uuids))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Test the prayer times calculator in praytimes.py.
+"""
+
+import datetime
+import math
+import random
+import sys
+import threading
+import unittest
+from os.path import dirname, abspath
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from praytimes import PrayTimes, EphemerisCache
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+DATE = datetime.date(2024, 3, 20)
+
+
+def random_locations(count, seed=1, lat=60):
+    rnd = random.Random(seed)
+    return [(rnd.uniform(-lat, lat), rnd.uniform(-180, 180)) for _ in range(count)]
+
+
+def float_times(prayers, date, coords, timezone=0):
+    return prayers.getTimes(date, coords, timezone, 0, 'Float')
+
+
+class EphemerisCacheTestCase(unittest.TestCase):
+    """Test the sun position cache shared by PrayTimes instances"""
+    def setUp(self):
+        self.prayers = PrayTimes('ISNA')
+        self.prayers.ephemeris = EphemerisCache()
+
+    def test_01_shared_locations(self):
+        """Locations all around the world share the entries of one date"""
+        for coords in random_locations(200):
+            float_times(self.prayers, DATE, coords)
+        stats = self.prayers.getEphemerisStats()
+        self.assertLessEqual(stats['misses'], 10)
+        self.assertGreater(stats['hits'], 100 * stats['misses'])
+
+    def test_02_bit_identical(self):
+        """A cached result does not depend on what was cached before"""
+        coords = (51.5, -0.1)
+        cold = float_times(self.prayers, DATE, coords)
+        for other in random_locations(50):
+            float_times(self.prayers, DATE, other)
+        self.assertEqual(float_times(self.prayers, DATE, coords), cold)
+        tiny = PrayTimes('ISNA')
+        tiny.ephemeris = EphemerisCache(size=1)
+        self.assertEqual(float_times(tiny, DATE, coords), cold)
+
+    def test_03_accuracy(self):
+        """Interpolated sun positions stay within a millisecond"""
+        direct = PrayTimes('ISNA')
+        direct.ephemeris = None
+        for coords in random_locations(100, lat=65):
+            for day in range(0, 366, 61):
+                date = DATE + datetime.timedelta(days=day)
+                expected = float_times(direct, date, coords)
+                for name, value in float_times(self.prayers, date, coords).items():
+                    if math.isnan(expected[name]):
+                        self.assertTrue(math.isnan(value), name)
+                    else:
+                        self.assertAlmostEqual(value, expected[name], delta=0.001 / 3600)
+
+    def test_04_counters(self):
+        """Hits and misses count the lookups"""
+        float_times(self.prayers, DATE, (21.4, 39.8), 3)
+        first = self.prayers.getEphemerisStats()
+        self.assertGreater(first['misses'], 0)
+        self.assertEqual(first['size'], first['misses'])
+        float_times(self.prayers, DATE, (21.4, 39.8), 3)
+        second = self.prayers.getEphemerisStats()
+        self.assertEqual(second['misses'], first['misses'])
+        self.assertEqual(second['hits'], 2 * first['hits'] + first['misses'])
+        self.prayers.ephemeris.clear()
+        self.assertEqual(self.prayers.getEphemerisStats()['hits'], 0)
+        self.assertEqual(self.prayers.getEphemerisStats()['size'], 0)
+
+
+class ThreadsTestCase(unittest.TestCase):
+    """Test sharing instances and the cache between threads"""
+    def test_01_shared_instances(self):
+        """Shared instances give the same times as per-thread ones"""
+        methods = sorted(PrayTimes.methods)
+        cache = EphemerisCache(size=16)
+        shared = {}
+        for method in methods:
+            shared[method] = PrayTimes(method)
+            shared[method].ephemeris = cache
+        locations = random_locations(40, seed=7, lat=65)
+        results, errors = {}, []
+
+        def work(index):
+            try:
+                method = methods[index % len(methods)]
+                local = PrayTimes(method)
+                local.ephemeris = EphemerisCache()
+                for day in range(0, 360, 30):
+                    date = DATE + datetime.timedelta(days=day)
+                    for coords in locations:
+                        got = float_times(shared[method], date, coords, 2)
+                        expected = float_times(local, date, coords, 2)
+                        if repr(got) != repr(expected):
+                            results[index] = (method, date, coords, got, expected)
+                            return
+            except Exception as err:
+                errors.append(err)
+
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(2 * len(methods))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(results, {})
+        self.assertLessEqual(len(cache.table), cache.size)
+
+
+@unittest.skipIf(numpy is None, 'numpy not installed')
+class BatchTestCase(unittest.TestCase):
+    """Test the numpy batch interface against getTimes"""
+    def assertSameTimes(self, expected, arrays, index, where):
+        for name, value in expected.items():
+            got = float(arrays[name][index])
+            if value == PrayTimes.invalidTime:
+                self.assertTrue(math.isnan(got), '%s %s: %r' % (where, name, got))
+            else:
+                diff = abs(got - value) % 24
+                self.assertLess(min(diff, 24 - diff), 1 / 3600.0, '%s %s' % (where, name))
+
+    def prayers(self, method, highLats=None):
+        prayers = PrayTimes(method)
+        if highLats:
+            prayers.adjust({'highLats': highLats})
+        return prayers
+
+    def test_01_year_range(self):
+        """getTimesRange matches getTimes on every day of a year"""
+        start = datetime.date(2024, 1, 1)
+        end = datetime.date(2024, 12, 31)
+        for method, highLats, coords in [('ISNA', None, (43, -80)),
+                                         ('MWL', None, (66.5, 25.7, 100)),
+                                         ('Jafari', 'None', (69.6, 18.9)),
+                                         ('Makkah', 'AngleBased', (-54.8, -68.3))]:
+            prayers = self.prayers(method, highLats)
+            arrays = prayers.getTimesRange(start, end, coords, 2)
+            self.assertEqual(len(arrays['fajr']), 366)
+            for day in range(366):
+                date = start + datetime.timedelta(days=day)
+                expected = prayers.getTimes(date, coords, 2, 0, 'Float')
+                self.assertSameTimes(expected, arrays, day, '%s %s' % (method, date))
+
+    def test_02_range_dst(self):
+        """A per-day dst array shifts only the days it is set on"""
+        prayers = self.prayers('MWL')
+        start = datetime.date(2024, 3, 25)
+        dst = [0, 0, 1, 1, 1]
+        arrays = prayers.getTimesRange(start, (2024, 3, 29), (51.5, -0.1), 0, dst)
+        for day in range(5):
+            date = start + datetime.timedelta(days=day)
+            expected = prayers.getTimes(date, (51.5, -0.1), 0, dst[day], 'Float')
+            self.assertSameTimes(expected, arrays, day, str(date))
+
+    def test_03_grid(self):
+        """getTimesGrid matches getTimes across latitudes and longitudes"""
+        lats = numpy.arange(-85, 90, 5.0)
+        lngs = numpy.arange(-180, 180, 15.0)
+        grid = numpy.stack(numpy.meshgrid(lats, lngs, indexing='ij'), axis=-1)
+        zones = numpy.round(grid[..., 1] / 15)
+        for method, highLats in [('MWL', None), ('ISNA', 'None'), ('Tehran', 'OneSeventh')]:
+            prayers = self.prayers(method, highLats)
+            for date in (datetime.date(2024, 6, 21), datetime.date(2024, 12, 21)):
+                arrays = prayers.getTimesGrid(date, grid, zones)
+                self.assertEqual(arrays['dhuhr'].shape, (len(lats), len(lngs)))
+                nans = 0
+                for index in numpy.ndindex(zones.shape):
+                    lat, lng = grid[index]
+                    expected = prayers.getTimes(date, (lat, lng), zones[index], 0, 'Float')
+                    nans += expected['sunrise'] == PrayTimes.invalidTime
+                    self.assertSameTimes(expected, arrays, index, '%s %s %s' % (method, date, (lat, lng)))
+                self.assertGreater(nans, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Test the cron jobs written by updateAzaanTimers.py.
+"""
+
+import contextlib
+import datetime
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from os.path import dirname, abspath, join as pathjoin
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+import updateAzaanTimers as azaan
+from crontab import CronTab
+
+
+class HorizonTestCase(unittest.TestCase):
+    """Test the general.horizon_days / --horizon setting"""
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix='adhan-test-')
+        self.config = pathjoin(self.tmp, 'settings.json')
+        self.tabfile = pathjoin(self.tmp, 'crontab')
+        with open(pathjoin(azaan.root_dir, 'settings.example.json'), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        data['general']['log_file'] = pathjoin(self.tmp, 'adhan.log')
+        with open(self.config, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def run_main(self, *args):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            azaan.main(['--config', self.config, '--tabfile', self.tabfile] + list(args))
+        return out.getvalue()
+
+    def test_01_max_horizon(self):
+        """The longest horizon schedules every prayer of every date once"""
+        self.run_main('--horizon', str(azaan.MAX_HORIZON_DAYS))
+        dates = {}
+        for job in CronTab(tabfile=self.tabfile).find_command('playAzaan.sh'):
+            doms = job.dom.render().split(',')
+            self.assertEqual(len(doms), len(set(doms)), str(job))
+            for dom in doms:
+                key = (job.month.render(), dom)
+                dates[key] = dates.get(key, 0) + 1
+        self.assertEqual(len(dates), azaan.MAX_HORIZON_DAYS)
+        self.assertEqual(set(dates.values()), set([5]))
+
+    def test_02_too_long(self):
+        """A horizon that would wrap to today next year is refused"""
+        with self.assertRaises(SystemExit):
+            self.run_main('--horizon', str(azaan.MAX_HORIZON_DAYS + 1))
+        self.assertFalse(os.path.exists(self.tabfile))
+
+
+def hhmm(minutes):
+    return '%02d:%02d' % divmod(minutes, 60)
+
+
+def leap_calendar():
+    """A mawaqit calendar whose times encode the day of the (leap) year"""
+    calendar = []
+    for month in range(1, 13):
+        days = {}
+        day = datetime.date(2024, month, 1)
+        while day.month == month:
+            index = day.timetuple().tm_yday - 1
+            days[str(day.day)] = [hhmm(180 + index), hhmm(360), hhmm(720 + index % 60),
+                                  hhmm(900), hhmm(1080 + index % 120), hhmm(1260)]
+            day += datetime.timedelta(days=1)
+        calendar.append(days)
+    return calendar
+
+
+class SidecarTestCase(unittest.TestCase):
+    """Test the binary sidecar of mawaqit JSON files"""
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix='adhan-test-')
+        self.json = pathjoin(self.tmp, 'mawaqit.json')
+        self.data = {'calendar': leap_calendar()}
+        self.write_json(self.data)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def write_json(self, data):
+        with open(self.json, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+    def days(self, year):
+        start = datetime.date(year, 1, 1)
+        return [start + datetime.timedelta(days=i)
+                for i in range((datetime.date(year + 1, 1, 1) - start).days)]
+
+    def test_01_round_trip(self):
+        """Every date of a leap year reads back the JSON times"""
+        azaan.write_mawaqit_sidecar(self.json)
+        days = self.days(2024)
+        expected = [azaan.mawaqit_day_times(self.data, day) for day in days]
+        self.assertEqual(azaan.read_mawaqit_sidecar(self.json, days), expected)
+        self.assertEqual(azaan.get_times_from_mawaqit(self.json, days), expected)
+
+    def test_02_february_29(self):
+        """Dates after February keep their leap year offset in any year"""
+        azaan.write_mawaqit_sidecar(self.json)
+        feb29, mar1 = azaan.read_mawaqit_sidecar(
+            self.json, [datetime.date(2024, 2, 29), datetime.date(2025, 3, 1)])
+        self.assertEqual(feb29['fajr'], datetime.time(3, 59))
+        self.assertEqual(mar1['fajr'], datetime.time(4, 0))
+        days = self.days(2025)
+        expected = [azaan.mawaqit_day_times(self.data, day) for day in days]
+        self.assertEqual(azaan.read_mawaqit_sidecar(self.json, days), expected)
+
+    def test_03_missing_day(self):
+        """A date missing from the calendar makes the reader fall back"""
+        del self.data['calendar'][1]['29']
+        self.write_json(self.data)
+        azaan.write_mawaqit_sidecar(self.json)
+        self.assertIsNone(azaan.read_mawaqit_sidecar(self.json, [datetime.date(2024, 2, 29)]))
+        self.assertIsNotNone(azaan.read_mawaqit_sidecar(self.json, self.days(2025)))
+
+    def test_04_stale(self):
+        """A JSON changed since the sidecar was written is read instead"""
+        azaan.write_mawaqit_sidecar(self.json)
+        size = os.path.getsize(self.json)
+        self.data['calendar'][0]['1'][0] = '03:01'
+        self.write_json(self.data)
+        stat = os.stat(self.json)
+        os.utime(self.json, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertEqual(os.path.getsize(self.json), size)
+        jan1 = [datetime.date(2024, 1, 1)]
+        self.assertIsNone(azaan.read_mawaqit_sidecar(self.json, jan1))
+        self.assertEqual(azaan.get_times_from_mawaqit(self.json, jan1)[0]['fajr'],
+                         datetime.time(3, 1))
+
+    def test_05_touched(self):
+        """A JSON that was only touched is recognised by its hash"""
+        azaan.write_mawaqit_sidecar(self.json)
+        stat = os.stat(self.json)
+        os.utime(self.json, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        jan1 = [datetime.date(2024, 1, 1)]
+        self.assertEqual(azaan.read_mawaqit_sidecar(self.json, jan1)[0]['fajr'],
+                         datetime.time(3, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
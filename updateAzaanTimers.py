@@ -1,28 +1,27 @@
 #!/usr/bin/env python3
 
-import datetime
 import time
+_start_time = time.perf_counter()
+
+import datetime
 import sys
 import json
 import os
 from os.path import dirname, abspath, join as pathjoin
-import argparse
-import shlex
-import getpass
 
 root_dir = dirname(abspath(__file__))
 sys.path.insert(0, pathjoin(root_dir, 'crontab'))
 
-from praytimes import PrayTimes
-PT = PrayTimes()
+strJobComment = 'rpiAdhanClockJob'
 
-from crontab import CronTab
-cron_user = getpass.getuser()
-system_cron = CronTab(user=cron_user)
+# Jobs are pinned to (month, day) without a year, so a longer horizon
+# would schedule today's date again a year later in the same job
+MAX_HORIZON_DAYS = 365
 
 # HELPER FUNCTIONS
 # ---------------------------------
 def parseArgs():
+    import argparse
     parser = argparse.ArgumentParser(description='Calculate prayer times and install cronjobs to play Adhan')
     parser.add_argument(
         '--config',
@@ -30,6 +29,20 @@ def parseArgs():
         default=pathjoin(root_dir, 'settings.json'),
         help='Path to JSON config file (default: ./settings.json)',
     )
+    parser.add_argument(
+        '--tabfile',
+        help='Write jobs to this crontab file instead of the user crontab',
+    )
+    parser.add_argument(
+        '--horizon',
+        type=int,
+        help='Number of days to schedule ahead (default: general.horizon_days or 1)',
+    )
+    parser.add_argument(
+        '--timings',
+        action='store_true',
+        help='Report how long startup, imports and each phase took (to stderr)',
+    )
     return parser
 
 def clamp_percent(v, field_name):
@@ -56,6 +69,31 @@ def load_config(config_path):
         sys.exit(1)
     return data, config_path
 
+def validate_config(general):
+    """Check the general settings shared by the scheduler and the daemon.
+
+    Prints an error and exits on invalid settings; returns the mode.
+    """
+    mode = general.get('mode', 'calculated')
+    if mode not in ('calculated', 'mawaqit'):
+        print('Error: general.mode must be "calculated" or "mawaqit"')
+        sys.exit(1)
+    try:
+        clamp_percent(general.get('default_volume', 100), 'general.default_volume')
+        parse_time_hhmm(general.get('update_time', '03:15'), 'general.update_time')
+    except ValueError as e:
+        print(f'Error: {e}')
+        sys.exit(1)
+    if mode == 'mawaqit' and not general.get('mawaqit_file'):
+        print('Error: general.mawaqit_file is required when mode is "mawaqit"')
+        sys.exit(1)
+    if mode == 'calculated':
+        location = general.get('location', {}) or {}
+        if location.get('lat') is None or location.get('lng') is None or not general.get('method'):
+            print('Error: general.location.lat, general.location.lng, and general.method are required when mode is "calculated"')
+            sys.exit(1)
+    return mode
+
 def parse_time_hhmm(value, field_name):
     try:
         hour_str, min_str = value.split(':', 1)
@@ -67,8 +105,8 @@ def parse_time_hhmm(value, field_name):
         raise ValueError(f'Invalid {field_name} (expected HH:MM): {value}')
     return hour, minute
 
-def get_times_from_mawaqit(mawaqit_file):
-    """Read prayer times from a mawaqit JSON file for the current date."""
+def get_times_from_mawaqit(mawaqit_file, days):
+    """Read prayer times from a mawaqit JSON file for each of the given dates."""
     # Resolve relative paths
     if not mawaqit_file.startswith('/') and not os.path.isabs(mawaqit_file):
         mawaqit_file = pathjoin(root_dir, mawaqit_file)
@@ -78,37 +116,172 @@ def get_times_from_mawaqit(mawaqit_file):
         print(f"Error: Mawaqit file not found: {mawaqit_file}")
         sys.exit(1)
 
+    # The binary sidecar written by mawaqit_util.py is much cheaper to read
+    day_times = read_mawaqit_sidecar(mawaqit_file, days)
+    if day_times is not None:
+        return day_times
+
     # Load and parse JSON
     with open(mawaqit_file, 'r', encoding='utf-8') as f:
         data = json.load(f)
 
-    # Get times for current date
-    now = datetime.datetime.now()
-    month_idx = now.month - 1  # 0-indexed
-    day_key = str(now.day)
+    return [mawaqit_day_times(data, day) for day in days]
+
+# Binary sidecar of a mawaqit JSON file: a header identifying the JSON it
+# was built from, then 366 days (leap year order) x 6 prayers [Fajr, Shuruq,
+# Dhuhr, Asr, Maghrib, Isha] as little-endian uint16 minutes after midnight.
+SIDECAR_MAGIC = b'MWQB'
+SIDECAR_VERSION = 1
+SIDECAR_HEADER = '<4sHqq32s'  # magic, version, json size, json mtime_ns, json sha256
+SIDECAR_PRAYERS = 6
+SIDECAR_MISSING = 0xFFFF
+# Days before each month in a leap year
+SIDECAR_MONTH_START = (0, 31, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335)
+
+def mawaqit_sidecar_path(mawaqit_file):
+    return mawaqit_file + '.bin'
+
+def write_mawaqit_sidecar(mawaqit_file, data=None):
+    """Write the binary sidecar of a mawaqit JSON file and return its path.
+
+    Days or times missing from the calendar are stored as SIDECAR_MISSING,
+    which makes the reader fall back to the JSON for those dates.
+    """
+    import hashlib
+    import struct
+    with open(mawaqit_file, 'rb') as f:
+        raw = f.read()
+        st = os.fstat(f.fileno())
+    if data is None:
+        data = json.loads(raw.decode('utf-8'))
+    minutes = [SIDECAR_MISSING] * (366 * SIDECAR_PRAYERS)
+    for month_idx, month in enumerate(data.get('calendar', [])[:12]):
+        for day_key, day_times in month.items():
+            try:
+                day = int(day_key)
+            except ValueError:
+                continue
+            if not 1 <= day <= 31:
+                continue
+            offset = (SIDECAR_MONTH_START[month_idx] + day - 1) * SIDECAR_PRAYERS
+            for idx, value in enumerate(day_times[:SIDECAR_PRAYERS]):
+                try:
+                    hour, minute = parse_time_hhmm(value, 'mawaqit time')
+                except (ValueError, AttributeError):
+                    continue
+                minutes[offset + idx] = hour * 60 + minute
+    header = struct.pack(SIDECAR_HEADER, SIDECAR_MAGIC, SIDECAR_VERSION,
+                         st.st_size, st.st_mtime_ns, hashlib.sha256(raw).digest())
+    path = mawaqit_sidecar_path(mawaqit_file)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(header)
+        f.write(struct.pack(f'<{len(minutes)}H', *minutes))
+    os.replace(tmp, path)
+    return path
+
+def read_mawaqit_sidecar(mawaqit_file, days):
+    """Read the given dates from the binary sidecar of a mawaqit JSON file.
+
+    Returns None when the sidecar is missing, unreadable, stale (the JSON
+    changed since it was written) or lacks one of the dates, so that the
+    caller falls back to the JSON.
+    """
+    import mmap
+    import struct
+    try:
+        f = open(mawaqit_sidecar_path(mawaqit_file), 'rb')
+    except OSError:
+        return None
+    header_size = struct.calcsize(SIDECAR_HEADER)
+    with f:
+        try:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        with buf:
+            if len(buf) != header_size + 366 * SIDECAR_PRAYERS * 2:
+                return None
+            magic, version, size, mtime_ns, digest = struct.unpack_from(SIDECAR_HEADER, buf)
+            if magic != SIDECAR_MAGIC or version != SIDECAR_VERSION:
+                return None
+            if not _sidecar_matches(mawaqit_file, size, mtime_ns, digest):
+                return None
+            result = []
+            for day in days:
+                offset = header_size + (SIDECAR_MONTH_START[day.month - 1] + day.day - 1) * SIDECAR_PRAYERS * 2
+                fajr, _, dhuhr, asr, maghrib, isha = struct.unpack_from('<6H', buf, offset)
+                times = {}
+                for name, value in (('fajr', fajr), ('dhuhr', dhuhr), ('asr', asr),
+                                    ('maghrib', maghrib), ('isha', isha)):
+                    if value == SIDECAR_MISSING:
+                        return None
+                    times[name] = datetime.time(value // 60, value % 60)
+                result.append(times)
+            return result
+
+def _sidecar_matches(mawaqit_file, size, mtime_ns, digest):
+    """Whether the JSON is still the one a sidecar was written from.
+
+    The size and mtime are enough in the common case; a JSON that was only
+    touched or copied is recognised by its hash instead.
+    """
+    st = os.stat(mawaqit_file)
+    if st.st_size != size:
+        return False
+    if st.st_mtime_ns == mtime_ns:
+        return True
+    import hashlib
+    with open(mawaqit_file, 'rb') as f:
+        return hashlib.sha256(f.read()).digest() == digest
+
+def mawaqit_day_times(data, day):
+    """Return the prayer times of one date from loaded mawaqit data."""
+    month_idx = day.month - 1  # 0-indexed
+    day_key = str(day.day)
 
     try:
         day_times = data['calendar'][month_idx][day_key]
     except (KeyError, IndexError) as e:
-        print(f"Error: Could not find times for {now.month}/{now.day} in mawaqit file: {e}")
+        print(f"Error: Could not find times for {day.month}/{day.day} in mawaqit file: {e}")
         sys.exit(1)
 
     # [Fajr, Shuruq, Dhuhr, Asr, Maghrib, Isha]
-    return {
-        'fajr': day_times[0],
-        'dhuhr': day_times[2],
-        'asr': day_times[3],
-        'maghrib': day_times[4],
-        'isha': day_times[5]
-    }
-
-def addAzaanTime (strPrayerName, strPrayerTime, objCronTab, strCommand):
+    times = {}
+    for name, idx in (('fajr', 0), ('dhuhr', 2), ('asr', 3), ('maghrib', 4), ('isha', 5)):
+        try:
+            hour, minute = parse_time_hhmm(day_times[idx], f'mawaqit {name} time')
+        except (ValueError, IndexError) as e:
+            print(f"Error: Could not read times for {day.month}/{day.day} in mawaqit file: {e}")
+            sys.exit(1)
+        times[name] = datetime.time(hour, minute)
+    return times
+
+def is_dst_on(day):
+    """Return the local DST flag at noon on the given date."""
+    return time.localtime(time.mktime((day.year, day.month, day.day, 12, 0, 0, 0, 0, -1))).tm_isdst
+
+def group_days(days, day_times, prayer_key):
+    """Group the dates sharing a prayer time within a month.
+
+    Returns a list of (time, month, [days of month]) in date order, so that
+    each entry can become a single cron job.
+    """
+    groups = {}
+    for day, times in zip(days, day_times):
+        prayer_time = times[prayer_key]
+        if prayer_time is None:
+            continue
+        groups.setdefault((prayer_time, day.month), []).append(day.day)
+    return [(prayer_time, month, doms) for (prayer_time, month), doms in groups.items()]
+
+def addAzaanTime (strPrayerName, objPrayerTime, objCronTab, strCommand, month=None, days=None):
   job = objCronTab.new(command=strCommand,comment=strPrayerName)
-  timeArr = strPrayerTime.split(':')
-  hour = timeArr[0]
-  min = timeArr[1]
-  job.minute.on(int(min))
-  job.hour.on(int(hour))
+  job.minute.on(objPrayerTime.minute)
+  job.hour.on(objPrayerTime.hour)
+  if days:
+    job.dom.on(*days)
+    job.month.on(month)
   job.set_comment(strJobComment)
   print(job)
   return
@@ -129,37 +302,9 @@ def addClearLogsCronJob (objCronTab, strCommand):
   job.set_comment(strJobComment)
   print(job)
   return
-# ---------------------------------
-# HELPER FUNCTIONS END
-
-# Parse arguments
-parser = parseArgs()
-args = parser.parse_args()
-
-config, config_path = load_config(args.config_path)
-general = config.get('general', {})
-prayers_cfg = config.get('prayers', {})
-
-mode = general.get('mode', 'calculated')
-if mode not in ('calculated', 'mawaqit'):
-    print('Error: general.mode must be "calculated" or "mawaqit"')
-    sys.exit(1)
-
-default_audio = general.get('default_audio', 'Adhan-Madinah.mp3')
-default_volume = clamp_percent(general.get('default_volume', 100), 'general.default_volume')
-log_file = general.get('log_file', 'adhan.log')
-update_time = general.get('update_time', '03:15')
-
-try:
-    update_hour, update_minute = parse_time_hhmm(update_time, 'general.update_time')
-except ValueError as e:
-    print(f'Error: {e}')
-    sys.exit(1)
-
-log_file_path = resolve_path(log_file) or pathjoin(root_dir, 'adhan.log')
-
-
-def get_prayer_config(name):
+def get_prayer_config(general, prayers_cfg, name):
+    default_audio = general.get('default_audio', 'Adhan-Madinah.mp3')
+    default_volume = clamp_percent(general.get('default_volume', 100), 'general.default_volume')
     cfg = prayers_cfg.get(name, {}) or {}
     enabled = cfg.get('enabled', True)
     audio = cfg.get('audio', default_audio)
@@ -171,69 +316,142 @@ def get_prayer_config(name):
     volume = clamp_percent(volume_value, f'prayers.{name}.volume')
     return enabled, audio, volume
 
-def build_play_command(audio, volume):
+def build_play_command(audio, volume, log_file_path):
+    from shlex import quote
     audio_path = resolve_path(audio) or audio
     if not audio_path:
         print('Error: audio file path is required for prayer playback')
         sys.exit(1)
     return '{} {} {} >> {} 2>&1'.format(
-        shlex.quote(pathjoin(root_dir, 'playAzaan.sh')),
-        shlex.quote(audio_path),
-        shlex.quote(str(volume)),
-        shlex.quote(log_file_path),
+        quote(pathjoin(root_dir, 'playAzaan.sh')),
+        quote(audio_path),
+        quote(str(volume)),
+        quote(log_file_path),
     )
 
-now = datetime.datetime.now()
+class Timings(object):
+    """Collects elapsed time per phase for --timings"""
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.last = _start_time
+        self.phases = []
+
+    def mark(self, phase):
+        if self.enabled:
+            now = time.perf_counter()
+            self.phases.append((phase, now - self.last))
+            self.last = now
+
+    def report(self):
+        if not self.enabled:
+            return
+        for phase, elapsed in self.phases:
+            print(f'{phase:>16}: {elapsed * 1000:8.1f} ms', file=sys.stderr)
+        print(f'{"total":>16}: {(time.perf_counter() - _start_time) * 1000:8.1f} ms', file=sys.stderr)
+# ---------------------------------
+# HELPER FUNCTIONS END
+
 
-# Determine mode and get prayer times
-if mode == 'mawaqit':
-    mawaqit_file = general.get('mawaqit_file')
-    if not mawaqit_file:
-        print('Error: general.mawaqit_file is required when mode is "mawaqit"')
-        sys.exit(1)
-    times = get_times_from_mawaqit(mawaqit_file)
-else:
-    location = general.get('location', {}) or {}
-    lat = location.get('lat')
-    lng = location.get('lng')
-    method = general.get('method')
-    if lat is None or lng is None or not method:
-        print('Error: general.location.lat, general.location.lng, and general.method are required when mode is "calculated"')
+def main(argv=None):
+    # Parse arguments
+    parser = parseArgs()
+    args = parser.parse_args(argv)
+    timings = Timings(args.timings)
+    timings.mark('startup')
+
+    config, config_path = load_config(args.config_path)
+    general = config.get('general', {})
+    prayers_cfg = config.get('prayers', {})
+
+    mode = validate_config(general)
+
+    log_file = general.get('log_file', 'adhan.log')
+    update_hour, update_minute = parse_time_hhmm(general.get('update_time', '03:15'), 'general.update_time')
+    horizon = args.horizon if args.horizon is not None else general.get('horizon_days', 1)
+
+    if not isinstance(horizon, int) or not 1 <= horizon <= MAX_HORIZON_DAYS:
+        print(f'Error: Invalid general.horizon_days (must be integer 1-{MAX_HORIZON_DAYS}): {horizon}')
         sys.exit(1)
-    PT.setMethod(method)
-    utcOffset = -(time.timezone/3600)
-    isDst = time.localtime().tm_isdst
-    times = PT.getTimes((now.year, now.month, now.day), (lat, lng), utcOffset, isDst)
-
-strUpdateCommand = '{}/updateAzaanTimers.py --config {} >> {} 2>&1'.format(
-    root_dir,
-    shlex.quote(config_path),
-    shlex.quote(log_file_path),
-)
-strClearLogsCommand = 'truncate -s 0 {} 2>&1'.format(shlex.quote(log_file_path))
-strJobComment = 'rpiAdhanClockJob'
 
-# Remove existing jobs created by this script
-system_cron.remove_all(comment=strJobComment)
-print(times['fajr'])
-print(times['dhuhr'])
-print(times['asr'])
-print(times['maghrib'])
-print(times['isha'])
-
-# Add times to crontab
-for prayer_key in ['fajr', 'dhuhr', 'asr', 'maghrib', 'isha']:
-    enabled, audio, volume = get_prayer_config(prayer_key)
-    if not enabled:
-        continue
-    play_cmd = build_play_command(audio, volume)
-    addAzaanTime(prayer_key, times[prayer_key], system_cron, play_cmd)
-
-# Run this script again overnight
-addUpdateCronJob(system_cron, strUpdateCommand, update_hour, update_minute)
-
-# Clear the logs every month
-addClearLogsCronJob(system_cron, strClearLogsCommand)
-
-system_cron.write_to_user(user=cron_user)
-print('Script execution finished at: ' + str(now))
+    log_file_path = resolve_path(log_file) or pathjoin(root_dir, 'adhan.log')
+    timings.mark('config')
+
+    now = datetime.datetime.now()
+    days = [now.date() + datetime.timedelta(days=i) for i in range(horizon)]
+
+    # Determine mode and get prayer times for every day of the horizon
+    if mode == 'mawaqit':
+        day_times = get_times_from_mawaqit(general['mawaqit_file'], days)
+    else:
+        location = general['location']
+        lat = location['lat']
+        lng = location['lng']
+        method = general['method']
+        from praytimes import PrayTimes
+        PT = PrayTimes(method)
+        utcOffset = -(time.timezone/3600)
+        day_times = [PT.getTimes(day, (lat, lng), utcOffset, is_dst_on(day), 'Time') for day in days]
+    times = day_times[0]
+    timings.mark('prayer times')
+
+    # Only now touch the crontab, which forks /usr/bin/crontab for users
+    from shlex import quote
+    from crontab import CronTab
+    if args.tabfile:
+        system_cron = CronTab(tabfile=args.tabfile) if os.path.exists(args.tabfile) else CronTab(tab='')
+    else:
+        import getpass
+        cron_user = getpass.getuser()
+        system_cron = CronTab(user=cron_user)
+    timings.mark('read crontab')
+
+    strUpdateCommand = '{}/updateAzaanTimers.py --config {}{}{} >> {} 2>&1'.format(
+        root_dir,
+        quote(config_path),
+        ' --tabfile ' + quote(abspath(args.tabfile)) if args.tabfile else '',
+        ' --horizon {}'.format(horizon) if args.horizon is not None else '',
+        quote(log_file_path),
+    )
+    strClearLogsCommand = 'truncate -s 0 {} 2>&1'.format(quote(log_file_path))
+
+    # Remove existing jobs created by this script, which also prunes the
+    # dated jobs of a previous horizon that have expired
+    system_cron.remove_all(comment=strJobComment)
+    for prayer_key in ['fajr', 'dhuhr', 'asr', 'maghrib', 'isha']:
+        print(times[prayer_key].strftime('%H:%M') if times[prayer_key] else '-----')
+
+    # Add times to crontab
+    for prayer_key in ['fajr', 'dhuhr', 'asr', 'maghrib', 'isha']:
+        enabled, audio, volume = get_prayer_config(general, prayers_cfg, prayer_key)
+        if not enabled:
+            continue
+        play_cmd = build_play_command(audio, volume, log_file_path)
+        if horizon > 1:
+            # One job per distinct time within a month, pinned to its days
+            for prayer_time, month, doms in group_days(days, day_times, prayer_key):
+                addAzaanTime(prayer_key, prayer_time, system_cron, play_cmd, month, doms)
+            continue
+        if times[prayer_key] is None:
+            print(f'Warning: No {prayer_key} time today at this location, skipping')
+            continue
+        addAzaanTime(prayer_key, times[prayer_key], system_cron, play_cmd)
+
+    # Run this script again overnight
+    addUpdateCronJob(system_cron, strUpdateCommand, update_hour, update_minute)
+
+    # Clear the logs every month
+    addClearLogsCronJob(system_cron, strClearLogsCommand)
+
+    # Only rewrite (and reload cron) when the jobs actually changed
+    if args.tabfile:
+        result = system_cron.write(filename=args.tabfile, diff=True)
+    else:
+        result = system_cron.write_to_user(user=cron_user, diff=True)
+    print('Crontab jobs: ' + str(result))
+    timings.mark('write crontab')
+    print('Script execution finished at: ' + str(now))
+    timings.report()
+
+
+if __name__ == '__main__':
+    main()